@@ -1,15 +1,40 @@
 import os
+import queue
 import random
+import socket
 import json
+import base64
+import hashlib
+import hmac
 import logging
+import threading
+import time
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, flash
 from flask_cors import CORS
+from sqlalchemy.exc import IntegrityError
 
-from config import WEB_URL, WEBAPP_URL, CBE_ACCOUNT_NAME, CBE_ACCOUNT_NUMBER, TELEBIRR_NAME, TELEBIRR_NUMBER
+from config import (
+    WEB_URL, WEBAPP_URL, CBE_ACCOUNT_NAME, CBE_ACCOUNT_NUMBER, TELEBIRR_NAME, TELEBIRR_NUMBER,
+    CARTELA_SIZE, GAME_ENGINE, MIN_PLAYERS, MAX_PLAYERS, PRICE_PATTERN_SETS, GAME_STORE_URL,
+    WRITE_BEHIND_INTERVAL, WRITE_BEHIND_MAX_PENDING, AUTO_CALL_INTERVAL,
+    FINISHED_GAME_TTL, WAITING_GAME_TTL, MAX_LIVE_GAMES, REAP_INTERVAL, SHARD_NAME, SHARD_NODES, SHARD_TOKEN,
+    SSE_QUEUE_SIZE, SSE_HEARTBEAT, SSE_CATCHUP, STATUS_MAX_WAIT, LOBBY_CACHE_TTL, GAME_PRICES, GAME_POOL_SIZE,
+    MATCHMAKING_FILL_WAIT
+)
 from database import db, init_db
-from models import User, Game, GameParticipant, Transaction
-from game_logic import BingoGame
+from models import User, Game, GameParticipant, GameEvent, Transaction
+from game_logic import CARTELAS, DEFAULT_PATTERN_SET, ENGINES, PATTERN_SETS, create_bingo_game
+from game_store import create_game_store
+from game_loader import load_open_games, release_pooled_games
+from write_behind import WriteBehindBuffer
+from auto_caller import AutoCaller
+from game_reaper import GameReaper
+from sharding import HashRing
+from pubsub import EventBus
+from lobby import LobbyCache
+from matchmaking import Matchmaker
+from game_pool import GamePool, game_code
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,9 +49,183 @@ CORS(app)
 # Initialize database
 init_db(app)
 
-# In-memory storage for active games (in production, use Redis)
-active_games = {}
-player_sessions = {}
+# Live game state; use a shared store (GAME_STORE_URL=sqlite:///...) with several workers
+game_store = create_game_store(GAME_STORE_URL)
+
+# Shard ring; empty when this process owns every game
+shard_ring = HashRing(SHARD_NODES)
+
+def owns_game(game_id):
+    return not shard_ring.nodes or shard_ring.node_for(game_id) == SHARD_NAME
+
+# Batched game writes; flushed on an interval and at game start / win
+write_behind = WriteBehindBuffer(app, WRITE_BEHIND_INTERVAL, WRITE_BEHIND_MAX_PENDING)
+
+# Live game events for streaming clients
+event_bus = EventBus(SSE_QUEUE_SIZE)
+
+# Waiting games by price for the lobby
+lobby_cache = LobbyCache(game_store, LOBBY_CACHE_TTL)
+
+def sync_game_row(game_id, game):
+    """Queue in-memory game state onto its games row"""
+    fields = {
+        'status': game.status,
+        'prize_pool': game.prize_pool,
+        'current_number': game.current_number,
+        'started_at': game.started_at,
+        'finished_at': game.finished_at,
+        'winner_id': game.winner_id,
+        'event_seq': game.event_seq,
+    }
+    if game.status == 'finished':
+        # Draws live in game_events; keep one snapshot for finished games
+        fields['called_numbers'] = json.dumps(game.called_numbers)
+    write_behind.update(Game, game_id, **fields)
+
+def record_event(game_id, game, event_type, number=None, user_id=None):
+    """Queue a game_events row, advance the game's cursor and publish the event"""
+    game.event_seq += 1
+    created_at = datetime.utcnow()
+    write_behind.insert(
+        GameEvent,
+        game_id=game_id,
+        seq=game.event_seq,
+        type=event_type,
+        number=number,
+        user_id=user_id,
+        created_at=created_at
+    )
+    event_bus.publish(game_id, {
+        'seq': game.event_seq,
+        'type': event_type,
+        'number': number,
+        'user_id': user_id,
+        'created_at': created_at.isoformat()
+    })
+
+def record_draws(game_id, game, since_calls):
+    """Queue draw events for every call made after `since_calls`"""
+    for number in game.called_numbers[since_calls:]:
+        record_event(game_id, game, 'draw', number=number)
+
+def caller_id():
+    """This process's name on game call leases"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+# A caller that stops renewing its lease for this long is replaced
+CALL_LEASE = AUTO_CALL_INTERVAL * 3
+
+def auto_call(game_id):
+    """Draw the next number for an active game; False once the game is over.
+    
+    With a shared store, every worker schedules every active game and the
+    one holding the game's call lease draws. The others check back once the
+    lease could have lapsed, so a game outlives the worker calling it.
+    """
+    if not owns_game(game_id):
+        return False
+    if not game_store.claim(game_id, caller_id(), CALL_LEASE):
+        return CALL_LEASE if game_id in game_store else False
+    with game_store.update(game_id) as game:
+        if game is None or game.status != 'active':
+            return False
+        
+        if not game.call_next_number():
+            sync_game_row(game_id, game)  # Out of numbers
+            return False
+        
+        record_event(game_id, game, 'draw', number=game.current_number)
+        sync_game_row(game_id, game)
+        return True
+
+def sync_marks(game_id, game, user_id):
+    """Queue a player's marks onto their game_participants row"""
+    write_behind.update_where(GameParticipant, {'game_id': game_id, 'user_id': user_id},
+                              marked_numbers=json.dumps(game.get_player_marked(user_id)))
+
+def archive_game(game_id, game):
+    """Queue a game's final state before it leaves memory; the caller flushes once for a batch"""
+    lobby_cache.invalidate()
+    sync_game_row(game_id, game)
+    for user_id in game.players:
+        sync_marks(game_id, game, user_id)  # Auto-daubed marks never went through place_mark
+
+# Evicts ended and idle games so the live store stays bounded
+game_reaper = GameReaper(game_store, archive_game, FINISHED_GAME_TTL, WAITING_GAME_TTL,
+                         MAX_LIVE_GAMES, REAP_INTERVAL, flush=lambda: write_behind.flush(sync=True))
+
+@app.before_request
+def start_background_workers():
+    game_reaper.start()
+    game_pool.start()
+    if auto_caller:
+        auto_caller.start()
+
+# Paces every active game from one scheduler thread
+auto_caller = AutoCaller(auto_call, AUTO_CALL_INTERVAL) if AUTO_CALL_INTERVAL > 0 else None
+
+def resume_game(game_id, game):
+    """Start a waiting game that has enough players, e.g. one that crashed before its first call"""
+    if game.status == 'waiting' and len(game.players) >= game.min_players:
+        game.start_game()
+        record_draws(game_id, game, 0)
+        sync_game_row(game_id, game)
+
+def load_games(game_ids=None):
+    """Load open games this process owns into the store and resume calling them"""
+    for loaded_id in load_open_games(game_store, game_ids, owns_game, resume_game):
+        if auto_caller and game_store.get(loaded_id).status == 'active':
+            auto_caller.schedule(loaded_id)
+
+def pool_owner_alive(owner):
+    """Whether the process named by a pooled_by value may still hold its pooled games"""
+    if not owner:
+        return False  # Pooled before owners were recorded
+    host, _, pid = owner.rpartition(':')
+    if host != socket.gethostname():
+        return True  # Unknowable from here; release_pooled_games() ages these out instead
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (ValueError, PermissionError):
+        pass  # Malformed, or alive under another user
+    return True
+
+recovered_pid = None
+
+def recover_games():
+    """Bring back the games that were live before a restart; call once from each server entry point.
+    
+    Imports of app (the bot, tools, a reloader's parent) never run this.
+    """
+    global recovered_pid
+    if recovered_pid == os.getpid():
+        return
+    recovered_pid = os.getpid()
+    
+    with app.app_context():
+        release_pooled_games(pool_owner_alive, WAITING_GAME_TTL, owns=owns_game)
+        load_open_games(game_store, owns=owns_game, prepare=resume_game)
+    
+    # Resume calling every active game in the store, including ones other workers
+    # started. Deferred until the first request, so a --preload master never calls.
+    if auto_caller:
+        for active_id in game_store.game_ids():
+            active_game = game_store.get(active_id)
+            if active_game is not None and active_game.status == 'active' and owns_game(active_id):
+                auto_caller.defer(active_id)
+
+@app.before_request
+def load_owned_game():
+    """Pick up a game this shard was handed by a rebalance"""
+    game_id = (request.view_args or {}).get('game_id')
+    if not shard_ring.nodes or game_id is None or game_id in game_store or not owns_game(game_id):
+        return
+    with game_store.update(game_id) as game:
+        if game is None:
+            load_games([game_id])
 
 @app.route('/')
 def index():
@@ -45,16 +244,142 @@ def lobby():
         session['user_id'] = user_id
         session.permanent = True
     
-    # Get active games from database
-    active_db_games = Game.query.filter_by(status='waiting').all()
-    
+    # Games are listed by the page from /lobby/games
     return render_template('game_lobby.html',
                          web_url=WEB_URL,
                          webapp_url=WEBAPP_URL,
                          game_price=game_price,
-                         active_games=active_db_games,
                          user_id=user_id)
 
+@app.route('/lobby/games')
+def lobby_games():
+    """Waiting games grouped by entry price, paginated by game id (?price=&after=&limit=)"""
+    price = request.args.get('price', type=int)
+    after = request.args.get('after', 0, type=int)
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    
+    _, tiers = lobby_cache.page(price, after, limit)
+    body = json.dumps({'success': True, 'tiers': tiers}, sort_keys=True)
+    # From the content, not the cache version, so it means the same thing on every worker and shard
+    etag = lobby_etag(body)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={int(LOBBY_CACHE_TTL)}'
+    return response
+
+def lobby_etag(body):
+    return 'lobby-' + hashlib.sha1(body.encode()).hexdigest()[:16]
+
+MAX_ID_PROBES = 10_000   # ids tried for one this shard owns; a shard on the ring owns ~1/N of them
+MAX_INSERT_ATTEMPTS = 5  # another worker of this shard may take the same id first
+
+def owned_game_id():
+    """Next unused game id this shard owns, or None when unsharded (the database picks one)"""
+    if not shard_ring.nodes:
+        return None
+    if SHARD_NAME not in shard_ring.nodes:
+        raise RuntimeError(f"Shard {SHARD_NAME!r} is not on the ring; it creates no games")
+    start = (db.session.execute(db.select(db.func.max(Game.id))).scalar() or 0) + 1
+    for game_id in range(start, start + MAX_ID_PROBES):
+        if owns_game(game_id):
+            return game_id
+    raise RuntimeError(f"No id owned by shard {SHARD_NAME!r} in {start}..{start + MAX_ID_PROBES}")
+
+def insert_game(entry_price, engine, pattern_set, status='waiting', pooled_by=None):
+    """Insert a game row this shard owns and build its in-memory game; returns (id, game)"""
+    bingo_game = create_bingo_game('', entry_price, MAX_PLAYERS, engine=engine, pattern_set=pattern_set)
+    
+    for attempt in range(MAX_INSERT_ATTEMPTS):
+        # Shards pick an id they own up front, so requests for it reach this store
+        game_id = owned_game_id()
+        game = Game(
+            id=game_id,
+            game_code=game_code(game_id) if game_id else f"~{os.urandom(8).hex()}",
+            entry_price=entry_price,
+            status=status,
+            max_players=MAX_PLAYERS,
+            draw_seed=bingo_game.seed,
+            pattern_set=pattern_set,
+            engine=engine,
+            pooled_by=pooled_by,
+            created_at=datetime.utcnow()
+        )
+        db.session.add(game)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            if game_id is None or attempt == MAX_INSERT_ATTEMPTS - 1:
+                raise
+            continue
+        break
+    # Otherwise the code comes from the id the database picked, set in the same transaction
+    game.game_code = bingo_game.game_code = game_code(game.id)
+    db.session.commit()
+    return game.id, bingo_game
+
+def provision_game(entry_price):
+    """Pre-created game for the warm pool; its row stays 'pooled' until it is taken"""
+    with app.app_context():
+        return insert_game(float(entry_price), GAME_ENGINE,
+                           PRICE_PATTERN_SETS.get(entry_price, DEFAULT_PATTERN_SET),
+                           status='pooled', pooled_by=caller_id())
+
+# Waiting games inserted ahead of demand, per entry price
+game_pool = GamePool(GAME_PRICES, provision_game, GAME_POOL_SIZE)
+
+def new_game(entry_price, engine=GAME_ENGINE, pattern_set=None):
+    """Create a waiting game in the database and the live store; returns (id, game)"""
+    default_set = PRICE_PATTERN_SETS.get(int(entry_price), DEFAULT_PATTERN_SET)
+    pattern_set = pattern_set or default_set
+    
+    # Games with the price's defaults come from the warm pool when it has one
+    pooled = None
+    if engine == GAME_ENGINE and pattern_set == default_set:
+        pooled = game_pool.take(int(entry_price))
+    if pooled:
+        game_id, bingo_game = pooled
+        # Also undoes a boot that wrongly took this process for dead and cancelled the row
+        write_behind.update(Game, game_id, status='waiting', pooled_by=None, finished_at=None,
+                            created_at=datetime.utcnow())
+    else:
+        game_id, bingo_game = insert_game(entry_price, engine, pattern_set)
+    
+    game_store.put(game_id, bingo_game)
+    lobby_cache.invalidate()
+    
+    logger.info(f"Game created: ID={game_id}, Code={bingo_game.game_code}, Price={entry_price}, "
+                f"Engine={engine}, Pooled={pooled is not None}")
+    return game_id, bingo_game
+
+def open_tier_game(entry_price):
+    """New filling game for a matchmaking tier; it starts when full or after the fill wait"""
+    with app.app_context():
+        game_id = new_game(float(entry_price))[0]
+    with game_store.update(game_id) as game:
+        game.min_players = game.max_players  # Does not start itself at MIN_PLAYERS
+    return game_id
+
+def start_filled_room(game_id):
+    """Start a matchmade room whose fill wait ran out before it filled"""
+    with app.app_context():
+        with game_store.update(game_id) as game:
+            if game is None or game.status != 'waiting' or len(game.players) < MIN_PLAYERS:
+                return
+            game.min_players = MIN_PLAYERS
+            resume_game(game_id, game)
+            lobby_cache.invalidate()
+        write_behind.flush(sync=True)
+    if auto_caller:
+        auto_caller.schedule(game_id)
+
+# One filling game per entry price, shared by workers through the game store
+matchmaker = Matchmaker(GAME_PRICES, open_tier_game, game_store)
+
 @app.route('/game/create', methods=['POST'])
 def create_game():
     """Create a new game"""
@@ -62,34 +387,26 @@ def create_game():
         data = request.json
         entry_price = float(data.get('entry_price', 10))
         user_id = data.get('user_id')
+        engine = data.get('engine', GAME_ENGINE)
         
         if entry_price not in [10, 20, 50, 100]:
             return jsonify({'success': False, 'error': 'Invalid entry price'}), 400
         
-        # Generate unique game code
-        game_code = f"B{random.randint(1000, 9999)}"
-        
-        # Create game in database
-        game = Game(
-            game_code=game_code,
-            entry_price=entry_price,
-            status='waiting',
-            created_at=datetime.utcnow()
-        )
-        db.session.add(game)
-        db.session.commit()
+        if engine not in ENGINES:
+            return jsonify({'success': False, 'error': 'Invalid game engine'}), 400
         
-        # Create in-memory game instance
-        bingo_game = BingoGame(game_code, entry_price)
-        active_games[game.id] = bingo_game
+        pattern_set = data.get('pattern_set') or PRICE_PATTERN_SETS.get(int(entry_price), DEFAULT_PATTERN_SET)
+        if pattern_set not in PATTERN_SETS:
+            return jsonify({'success': False, 'error': 'Invalid pattern set'}), 400
         
-        logger.info(f"Game created: ID={game.id}, Code={game_code}, Price={entry_price}")
+        game_id, bingo_game = new_game(entry_price, engine, pattern_set)
         
         return jsonify({
             'success': True,
-            'game_id': game.id,
-            'game_code': game_code,
-            'entry_price': entry_price
+            'game_id': game_id,
+            'game_code': bingo_game.game_code,
+            'entry_price': entry_price,
+            'pattern_set': pattern_set
         })
         
     except Exception as e:
@@ -99,22 +416,124 @@ def create_game():
 @app.route('/game/<int:game_id>/select')
 def select_cartela(game_id):
     """Cartela selection page"""
-    if game_id not in active_games:
+    game = game_store.get(game_id)
+    if game is None:
         return "Game not found or has ended", 404
     
-    game = active_games[game_id]
-    
-    # Get used cartela numbers
-    used_numbers = []
-    for player in game.players.values():
-        used_numbers.append(player['cartela_number'])
-    
     return render_template('cartela_selection.html',
                          game_id=game_id,
                          game_code=game.game_code,
                          entry_price=game.entry_price,
-                         used_numbers=used_numbers,
-                         max_cartela=100)
+                         max_cartela=CARTELA_SIZE)
+
+@app.route('/cartela/<int:cartela_number>')
+def cartela_board(cartela_number):
+    """One cartela's board (0 is the FREE cell), loaded when a player picks it"""
+    cartela = CARTELAS.get(cartela_number)
+    if cartela is None:
+        return jsonify({'success': False, 'error': 'Invalid cartela number'}), 404
+    
+    # Boards are seeded by cartela number, so they never change
+    response = jsonify({'success': True, 'number': cartela.number, 'board': list(cartela.board)})
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+@app.route('/game/<int:game_id>/cartelas')
+def cartela_availability(game_id):
+    """Taken cartelas as a base64 bitmap (cartela n is bit n % 8 of byte n // 8)"""
+    game = game_store.get(game_id)
+    if game is None:
+        return jsonify({'success': False, 'error': 'Game not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'max_cartela': CARTELA_SIZE,
+        'taken_count': len(game.players),
+        'taken': base64.b64encode(game.taken_bitmap()).decode('ascii')
+    })
+
+def seat_player(game_id, game, user_id, cartela_number):
+    """Add a player to a game held by game_store.update() and record the join"""
+    # Join game (may auto-start it and make the first call)
+    calls_before = game.calls
+    if not game.add_player(user_id, cartela_number):
+        return False
+    
+    lobby_cache.invalidate()  # Player count changed, or the game started
+    
+    # Save to database
+    write_behind.insert(
+        GameParticipant,
+        game_id=game_id,
+        user_id=user_id,
+        cartela_number=cartela_number,
+        cartela_numbers=json.dumps(game.players[user_id].cartela),
+        created_at=datetime.utcnow()
+    )
+    record_event(game_id, game, 'join', number=cartela_number, user_id=user_id)
+    record_draws(game_id, game, calls_before)
+    sync_game_row(game_id, game)
+    
+    # Durability point: the game just started
+    if calls_before == 0 and game.calls:
+        write_behind.flush(sync=True)
+        if auto_caller:
+            auto_caller.schedule(game_id)
+    elif game.min_players > MIN_PLAYERS and len(game.players) == MIN_PLAYERS:
+        # A matchmade room became playable; it starts after the wait unless it fills first
+        timer = threading.Timer(MATCHMAKING_FILL_WAIT, start_filled_room, (game_id,))
+        timer.daemon = True
+        timer.start()
+    return True
+
+@app.route('/matchmaking/join', methods=['POST'])
+def matchmaking_join():
+    """Seat the player in the filling game of an entry price (cartela optional)"""
+    try:
+        data = request.json or {}
+        entry_price = int(data.get('entry_price', 10))
+        cartela_number = data.get('cartela_number')
+        
+        if entry_price not in GAME_PRICES:
+            return jsonify({'success': False, 'error': 'Invalid entry price'}), 400
+        
+        if cartela_number is not None and int(cartela_number) not in CARTELAS:
+            return jsonify({'success': False, 'error': 'Invalid cartela number'}), 400
+        
+        user_id = session.get('user_id')
+        if not user_id:
+            user_id = random.randint(100000, 999999)
+            session['user_id'] = user_id
+            session.permanent = True
+        
+        seat = {}
+        
+        def join(game_id):
+            with game_store.update(game_id) as game:
+                if game is None or game.status != 'waiting' or len(game.players) >= game.max_players:
+                    return False, False
+                number = int(cartela_number) if cartela_number is not None else game.first_free_cartela()
+                if number is None:
+                    return False, False
+                seated = seat_player(game_id, game, user_id, number)
+                seat['cartela_number'] = number
+                return seated, game.status == 'waiting' and len(game.players) < game.max_players
+        
+        game_id = matchmaker.seat(entry_price, join)
+        if game_id is None:
+            return jsonify({'success': False, 'error': 'Failed to join game'}), 400
+        
+        logger.info(f"Player {user_id} matched into game {game_id} with cartela {seat['cartela_number']}")
+        
+        return jsonify({
+            'success': True,
+            'game_id': game_id,
+            'cartela_number': seat['cartela_number']
+        })
+        
+    except Exception as e:
+        logger.error(f"Error matchmaking: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/game/<int:game_id>/join', methods=['POST'])
 def join_game(game_id):
@@ -124,42 +543,24 @@ def join_game(game_id):
         cartela_number = int(data.get('cartela_number'))
         user_id = session.get('user_id', random.randint(100000, 999999))
         
-        if game_id not in active_games:
-            return jsonify({'success': False, 'error': 'Game not found'}), 404
-        
-        game = active_games[game_id]
-        
         # Validate cartela number
-        if cartela_number < 1 or cartela_number > 100:
+        if cartela_number not in CARTELAS:
             return jsonify({'success': False, 'error': 'Invalid cartela number'}), 400
         
-        # Join game
-        if game.add_player(user_id, cartela_number):
-            # Store user session
-            player_sessions[user_id] = game_id
-            
-            # Save to database
-            db_game = Game.query.get(game_id)
-            if db_game:
-                participant = GameParticipant(
-                    game_id=db_game.id,
-                    user_id=user_id,
-                    cartela_number=cartela_number,
-                    cartela_numbers=json.dumps(game.players[user_id]['cartela']),
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(participant)
-                db.session.commit()
-            
-            logger.info(f"Player {user_id} joined game {game_id} with cartela {cartela_number}")
+        with game_store.update(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Game not found'}), 404
             
-            return jsonify({
-                'success': True,
-                'game_id': game_id,
-                'cartela_number': cartela_number
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Failed to join game'}), 400
+            if not seat_player(game_id, game, user_id, cartela_number):
+                return jsonify({'success': False, 'error': 'Failed to join game'}), 400
+        
+        logger.info(f"Player {user_id} joined game {game_id} with cartela {cartela_number}")
+        
+        return jsonify({
+            'success': True,
+            'game_id': game_id,
+            'cartela_number': cartela_number
+        })
             
     except Exception as e:
         logger.error(f"Error joining game: {str(e)}")
@@ -168,10 +569,10 @@ def join_game(game_id):
 @app.route('/game/<int:game_id>')
 def game_page(game_id):
     """Main game page"""
-    if game_id not in active_games:
+    game = game_store.get(game_id)
+    if game is None:
         return redirect(url_for('lobby'))
     
-    game = active_games[game_id]
     user_id = session.get('user_id')
     
     if not user_id or user_id not in game.players:
@@ -198,40 +599,41 @@ def game_page(game_id):
                          game_code=game.game_code,
                          game=game,
                          player=player,
+                         player_marked=game.get_player_marked(user_id),
                          called_numbers=formatted_called,
                          current_number=game.current_number,
                          entry_price=game.entry_price,
                          prize_pool=game.prize_pool,
-                         player_count=len(game.players))
+                         player_count=len(game.players),
+                         last_seq=game.event_seq)
 
 @app.route('/game/<int:game_id>/call', methods=['POST'])
 def call_number(game_id):
     """Call next number in game"""
-    if game_id not in active_games:
-        return jsonify({'success': False, 'error': 'Game not found'}), 404
-    
-    game = active_games[game_id]
-    
-    if game.status != 'active':
-        return jsonify({'success': False, 'error': 'Game is not active'}), 400
+    if auto_caller:
+        return jsonify({'success': False, 'error': 'Numbers are called automatically'}), 403
     
-    number = game.call_next_number()
-    
-    if number:
+    with game_store.update(game_id) as game:
+        if game is None:
+            return jsonify({'success': False, 'error': 'Game not found'}), 404
+        
+        if game.status != 'active':
+            return jsonify({'success': False, 'error': 'Game is not active'}), 400
+        
+        number = game.call_next_number()
+        
+        if not number:
+            return jsonify({'success': False, 'error': 'No more numbers to call'}), 400
+        
         # Update database
-        db_game = Game.query.get(game_id)
-        if db_game:
-            db_game.current_number = number
-            db_game.called_numbers = json.dumps(game.called_numbers)
-            db.session.commit()
+        record_event(game_id, game, 'draw', number=game.current_number)
+        sync_game_row(game_id, game)
         
         return jsonify({
             'success': True,
             'number': number,
             'called_numbers': game.called_numbers
         })
-    else:
-        return jsonify({'success': False, 'error': 'No more numbers to call'}), 400
 
 @app.route('/game/<int:game_id>/mark', methods=['POST'])
 def mark_number(game_id):
@@ -239,63 +641,273 @@ def mark_number(game_id):
     try:
         data = request.json
         number = int(data.get('number', 0))
-        user_id = session.get('user_id')
+        result, status = place_mark(game_id, session.get('user_id'), number)
+        return jsonify(result), status
+            
+    except Exception as e:
+        logger.error(f"Error marking number: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def place_mark(game_id, user_id, number):
+    """Mark a number for a player and settle a win; returns (response, HTTP status)"""
+    with game_store.update(game_id) as game:
+        if game is None:
+            return {'success': False, 'error': 'Game not found'}, 404
         
-        if game_id not in active_games:
-            return jsonify({'success': False, 'error': 'Game not found'}), 404
+        if not user_id or user_id not in game.players:
+            return {'success': False, 'error': 'Player not in game'}, 404
         
-        if not user_id or user_id not in active_games[game_id].players:
-            return jsonify({'success': False, 'error': 'Player not in game'}), 404
+        if game.status != 'active':
+            return {'success': False, 'error': 'Game is not active'}, 400
         
-        game = active_games[game_id]
+        if not game.mark_number(user_id, number):
+            return {'success': False, 'error': 'Cannot mark this number'}, 400
+        sync_marks(game_id, game, user_id)
         
-        if game.mark_number(user_id, number):
-            # Check for win
-            if game.check_winner(user_id):
-                game.declare_winner(user_id)
-                return jsonify({
-                    'success': True,
-                    'winner': True,
-                    'message': '🎉 BINGO! You won the game!'
-                })
+        # Check for win; declare_winner() refuses once someone has won
+        if game.declare_winner(user_id):
+            # Durability point: winner declared
+            record_event(game_id, game, 'win', user_id=user_id)
+            sync_game_row(game_id, game)
+            write_behind.flush(sync=True)
+            if auto_caller:
+                auto_caller.cancel(game_id)
             
-            return jsonify({
+            return {
                 'success': True,
-                'marked': True,
-                'marked_numbers': game.players[user_id]['marked']
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Cannot mark this number'}), 400
-            
-    except Exception as e:
-        logger.error(f"Error marking number: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+                'winner': True,
+                'message': '🎉 BINGO! You won the game!'
+            }, 200
+        
+        return {
+            'success': True,
+            'marked': True,
+            'marked_numbers': game.get_player_marked(user_id)
+        }, 200
 
 @app.route('/game/<int:game_id>/status')
 def game_status(game_id):
-    """Get current game status"""
-    if game_id not in active_games:
+    """Get current game status.
+    
+    The game's version is its event sequence. Supports If-None-Match (304),
+    ?since=<version> for only the draws after that version, and ?wait=<seconds>
+    to hold the request until the version moves past `since` / the ETag.
+    """
+    game = game_store.get(game_id)
+    if game is None:
         return jsonify({'success': False, 'error': 'Game not found'}), 404
     
-    game = active_games[game_id]
     user_id = session.get('user_id')
+    since = request.args.get('since', type=int)
+    wait = min(request.args.get('wait', 0, type=float), STATUS_MAX_WAIT)
+    
+    def unchanged(game):
+        if since is not None:
+            return game.event_seq <= since
+        return status_etag(game, user_id) in request.if_none_match
     
-    player_data = None
-    if user_id in game.players:
-        player_data = {
-            'cartela_number': game.players[user_id]['cartela_number'],
-            'marked': game.players[user_id]['marked']
+    # Long-poll: block on the game's next event instead of answering right away.
+    # The bus only carries this process's events, so the store is checked every SSE_CATCHUP too.
+    if wait > 0 and unchanged(game):
+        subscription = event_bus.subscribe(game_id)
+        deadline = time.monotonic() + wait
+        try:
+            game = game_store.get(game_id)
+            while game is not None and unchanged(game):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    subscription.get(timeout=min(SSE_CATCHUP, remaining))
+                    break
+                except queue.Empty:
+                    game = game_store.get(game_id)
+        finally:
+            event_bus.unsubscribe(subscription)
+        game = game_store.get(game_id)
+        if game is None:
+            return jsonify({'success': False, 'error': 'Game not found'}), 404
+    
+    etag = status_etag(game, user_id)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        player_data = None
+        if user_id in game.players:
+            player_data = {
+                'cartela_number': game.players[user_id].cartela_number,
+                'marked': game.get_player_marked(user_id)
+            }
+        
+        data = {
+            'success': True,
+            'game_code': game.game_code,
+            'version': game.event_seq,
+            'status': game.status,
+            'current_number': game.current_number,
+            'player_count': len(game.players),
+            'prize_pool': game.prize_pool,
+            'player': player_data
         }
+        if since is None:
+            data['called_numbers'] = game.called_numbers
+        else:
+            data['since'] = since
+            data['new_numbers'] = list(game.draw_order[calls_at(game, since):game.calls])
+        response = jsonify(data)
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def status_etag(game, user_id):
+    """Changes with the game's version, its status, and the caller's own marks"""
+    marks = len(game.get_player_marked(user_id)) if user_id in game.players else 0
+    return f"{game.event_seq}-{game.status}-{marks}"
+
+def calls_at(game, version):
+    """Numbers called as of a version; every join is recorded before the first draw"""
+    return min(max(version - len(game.players), 0), game.calls)
+
+def event_json(event):
+    return {
+        'seq': event.seq,
+        'type': event.type,
+        'number': event.number,
+        'user_id': event.user_id,
+        'created_at': event.created_at.isoformat()
+    }
+
+def stored_events(game_id, since, limit=500):
+    return [event_json(event) for event in GameEvent.query.filter(
+        GameEvent.game_id == game_id,
+        GameEvent.seq > since
+    ).order_by(GameEvent.seq).limit(limit).all()]
+
+def stream_events(game_id, since):
+    """Server-Sent Events: stored events after `since`, then live ones until the game ends.
+    
+    The event bus only reaches subscribers in the process that made the
+    change. When it has been quiet for SSE_CATCHUP seconds, the stream
+    compares the store's event_seq with what it has sent and reads anything
+    missing from game_events, so clients on other workers keep up too.
+    """
+    game = game_store.get(game_id)
+    if game is None:
+        return jsonify({'success': False, 'error': 'Game not found'}), 404
+    
+    # Subscribe before reading the backlog so nothing falls in between
+    subscription = event_bus.subscribe(game_id)
+    if since < game.event_seq:
+        write_behind.flush()
+    backlog = stored_events(game_id, since)
+    
+    def stream():
+        last_seq = since
+        idle = 0.0
+        try:
+            yield 'retry: 3000\n\n'
+            pending = iter(backlog)
+            while True:
+                event = next(pending, None)
+                if event is None:
+                    try:
+                        event = subscription.get(timeout=SSE_CATCHUP)
+                    except queue.Empty:
+                        current = game_store.get(game_id)
+                        if subscription.dropped or current is None:
+                            return  # Client reconnects (or falls back to polling)
+                        if current.event_seq > last_seq:
+                            # Made by another worker; its events reach the database within a flush
+                            with app.app_context():
+                                missed = stored_events(game_id, last_seq)
+                            if missed:
+                                pending = iter(missed)
+                                continue
+                        if current.status in ('finished', 'cancelled'):
+                            return
+                        idle += SSE_CATCHUP
+                        if idle >= SSE_HEARTBEAT:
+                            idle = 0.0
+                            yield ': keepalive\n\n'
+                        continue
+                
+                idle = 0.0
+                if event['seq'] <= last_seq:
+                    continue  # Already sent from the backlog
+                last_seq = event['seq']
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                if event['type'] == 'win':
+                    return
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/game/<int:game_id>/events')
+def game_events(game_id):
+    """Game events (join, draw, win) after sequence `since`, oldest first.
+    
+    Clients sending Accept: text/event-stream get a live SSE stream instead.
+    """
+    since = request.args.get('since', 0, type=int)
+    if 'text/event-stream' in request.headers.get('Accept', ''):
+        return stream_events(game_id, request.headers.get('Last-Event-ID', since, type=int))
+    
+    limit = min(request.args.get('limit', 500, type=int), 500)
+    
+    events = stored_events(game_id, since, limit)
     
     return jsonify({
         'success': True,
-        'game_code': game.game_code,
-        'status': game.status,
-        'current_number': game.current_number,
-        'called_numbers': game.called_numbers,
-        'player_count': len(game.players),
-        'prize_pool': game.prize_pool,
-        'player': player_data
+        'game_id': game_id,
+        'events': events,
+        'last_seq': events[-1]['seq'] if events else since
+    })
+
+@app.route('/shard/ring', methods=['POST'])
+def set_shard_ring():
+    """Adopt a new shard ring and hand off games this shard no longer owns"""
+    if not SHARD_NAME or not SHARD_TOKEN:
+        return jsonify({'success': False, 'error': 'Not a shard'}), 404
+    if not hmac.compare_digest(request.headers.get('X-Shard-Token', ''), SHARD_TOKEN):
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    
+    shard_ring.set_nodes(request.json.get('nodes', []))
+    # Unused pooled games that moved are cancelled; their new owner has its own pool
+    for game_id in game_pool.discard(lambda pooled_id: not owns_game(pooled_id)):
+        write_behind.update(Game, game_id, status='cancelled', finished_at=datetime.utcnow())
+    handed_off = 0
+    for game_id in game_store.game_ids():
+        if owns_game(game_id):
+            continue
+        with game_store.update(game_id) as game:
+            if game is None:
+                continue
+            # The new owner rebuilds it from the database
+            archive_game(game_id, game)
+            game_store.delete(game_id)
+        if auto_caller:
+            auto_caller.cancel(game_id)
+        handed_off += 1
+    write_behind.flush(sync=True)  # The router switches once this answers
+    
+    logger.info(f"Shard {SHARD_NAME} ring is now {shard_ring.nodes}, handed off {handed_off} games")
+    return jsonify({'success': True, 'handed_off': handed_off})
+
+@app.route('/metrics')
+def metrics():
+    """Internal counters"""
+    return jsonify({
+        'success': True,
+        'write_behind': write_behind.stats(),
+        'auto_caller': auto_caller.stats() if auto_caller else None,
+        'games': game_reaper.stats(),
+        'events': event_bus.stats(),
+        'lobby': lobby_cache.stats(),
+        'matchmaking': matchmaker.stats(),
+        'game_pool': game_pool.stats()
     })
 
 @app.route('/webhook/deposit', methods=['POST'])
@@ -413,4 +1025,6 @@ def internal_error(error):
 if __name__ == '__main__':
     # Only run locally, not on Railway
     port = int(os.environ.get("PORT", 5000))
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        recover_games()  # In the reloader's child, which serves requests
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+Server-side number caller for every active game.
+
+One asyncio loop on a background thread keeps a single heap of
+(due time, game_id) timers, so pacing tens of thousands of games costs one
+timer instead of a thread or task per game. `call(game_id)` draws the next
+number and returns False once the game is over, which drops it from the
+schedule, or a number of seconds to check back after without drawing
+(e.g. while another process holds the game's call lease).
+
+Games scheduled with defer() before the loop runs in a process, such as
+at import time in a gunicorn --preload master, wait in the heap and are
+kept across the fork until start() runs the loop in a worker.
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class AutoCaller:
+    def __init__(self, call: Callable[[int], bool], interval: float = 5.0):
+        self.call = call
+        self.interval = interval
+        self.heap: List[Tuple[float, int]] = []
+        self.due: Dict[int, float] = {}  # game_id -> due time of its live heap entry
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+        self.counters = {
+            'calls': 0,     # numbers drawn
+            'deferred': 0,  # checks skipped, e.g. another process holds the lease
+            'finished': 0,  # games dropped because they ended
+            'errors': 0,
+            'max_lag': 0.0, # worst delay past a due time, seconds
+        }
+
+    def start(self):
+        """(Re)start the loop in this process, e.g. after a gunicorn fork; already scheduled games are kept"""
+        if self.pid == os.getpid():
+            return
+        with self.start_lock:
+            if self.pid != os.getpid():
+                ready = threading.Event()
+                threading.Thread(target=self._thread, args=(ready,), name="auto-caller", daemon=True).start()
+                ready.wait()
+                self.pid = os.getpid()
+
+    def _thread(self, ready: threading.Event):
+        self.loop = asyncio.new_event_loop()
+        self.wakeup = asyncio.Event()
+        ready.set()
+        self.loop.run_until_complete(self._run())
+
+    def schedule(self, game_id: int, delay: Optional[float] = None):
+        """(Re)schedule a game's next call `delay` seconds from now (default: interval)"""
+        self.start()
+        due = time.monotonic() + (self.interval if delay is None else delay)
+        self.loop.call_soon_threadsafe(self._push, game_id, due, True)
+
+    def defer(self, game_id: int, delay: Optional[float] = None):
+        """Schedule a game without starting the loop if it is not running in this process yet"""
+        with self.start_lock:
+            if self.pid != os.getpid():
+                self._push(game_id, time.monotonic() + (self.interval if delay is None else delay))
+                return
+        self.schedule(game_id, delay)
+
+    def cancel(self, game_id: int):
+        """Stop calling numbers for a game"""
+        self.start()
+        self.loop.call_soon_threadsafe(self.due.pop, game_id, None)
+
+    def _push(self, game_id: int, due: float, wake: bool = False):
+        # Older heap entries for the game go stale and are skipped when popped
+        self.due[game_id] = due
+        heapq.heappush(self.heap, (due, game_id))
+        if wake and self.heap[0][1] == game_id:
+            self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            timeout = self.heap[0][0] - time.monotonic() if self.heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                continue
+
+            due, game_id = heapq.heappop(self.heap)
+            if self.due.get(game_id) != due:
+                continue  # Cancelled or rescheduled
+            del self.due[game_id]
+            self._fire(game_id, due)
+            await asyncio.sleep(0)  # Let schedule()/cancel() in between calls
+
+    def _fire(self, game_id: int, due: float):
+        now = time.monotonic()
+        self.counters['max_lag'] = max(self.counters['max_lag'], now - due)
+        try:
+            running = self.call(game_id)
+        except Exception as e:
+            logger.error(f"Auto-call failed for game {game_id}: {str(e)}")
+            self.counters['errors'] += 1
+            running = False
+
+        if running is True:
+            self.counters['calls'] += 1
+            # Pace from the due time so the cadence doesn't drift under load
+            self._push(game_id, max(due + self.interval, now))
+        elif running:
+            self.counters['deferred'] += 1
+            self._push(game_id, now + running)
+        else:
+            self.counters['finished'] += 1
+
+    def stats(self) -> dict:
+        return dict(self.counters, games=len(self.due), interval=self.interval)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the Bingo game engine
+Use: python benchmark.py [wins|engines|memory|joins|settle|patterns|scheduler|all]
+"""
+
+import os
+import sys
+import time
+import random
+import timeit
+import tracemalloc
+
+# Large rooms need a cartela pool at least as big as the room
+os.environ.setdefault("CARTELA_SIZE", "10000")
+
+from game_logic import (
+    CARTELAS, PATTERNS, PATTERN_SETS, WIN_MASKS, ENGINES, PatternSet, create_bingo_game,
+    draw_sequence, earliest_wins, is_winning_mask, mask_to_indices
+)
+
+PLAYER_COUNTS = [100, 10_000]
+ENGINE_PLAYER_COUNTS = [100, 1_000, 10_000]
+MEMORY_PLAYER_COUNTS = [1_000, 10_000, 100_000]
+
+def legacy_check_winner(marked: list) -> bool:
+    """Set-based win check used before the bitmask engine"""
+    marked_set = set(marked)
+    for row in range(5):
+        if all(idx in marked_set for idx in [row * 5 + col for col in range(5)]):
+            return True
+    for col in range(5):
+        if all(idx in marked_set for idx in [row * 5 + col for row in range(5)]):
+            return True
+    for pattern in ([0, 6, 12, 18, 24], [4, 8, 12, 16, 20], [0, 4, 20, 24]):
+        if all(idx in marked_set for idx in pattern):
+            return True
+    return False
+
+def random_masks(count: int, marks: int = 10, seed: int = 42) -> list:
+    """Random mid-game mark states (FREE center plus `marks` cells)"""
+    rng = random.Random(seed)
+    cells = [idx for idx in range(25) if idx != 12]
+    masks = []
+    for _ in range(count):
+        mask = 1 << 12
+        for idx in rng.sample(cells, marks):
+            mask |= 1 << idx
+        masks.append(mask)
+    return masks
+
+def report(name: str, players: int, legacy: float, new: float,
+           labels: tuple = ("legacy", "new")):
+    """Print one benchmark line"""
+    print(f"{name:<12} {players:>7} players  "
+          f"{labels[0]} {legacy * 1000:8.2f} ms  {labels[1]} {new * 1000:8.2f} ms  "
+          f"speedup {legacy / new:5.1f}x")
+
+def bench_wins(repeat: int = 5):
+    """Win check over every player: set-based vs bitmask"""
+    print(f"🎯 Win check ({len(WIN_MASKS)} patterns)")
+    for players in PLAYER_COUNTS:
+        masks = random_masks(players)
+        marked = [mask_to_indices(mask) for mask in masks]
+        assert [legacy_check_winner(m) for m in marked] == [is_winning_mask(m) for m in masks]
+
+        legacy = min(timeit.repeat(lambda: [legacy_check_winner(m) for m in marked],
+                                   number=1, repeat=repeat))
+        new = min(timeit.repeat(lambda: [is_winning_mask(m) for m in masks],
+                                number=1, repeat=repeat))
+        report("check", players, legacy, new)
+
+def filled_room(engine: str, players: int, seed: int = 7):
+    """A room with every seat taken, ready to call numbers (auto-daub on)"""
+    game = create_bingo_game("BENCH", 10, players, engine=engine, auto_daub=True, seed=seed)
+    game.min_players = players
+    for user_id in range(1, players + 1):
+        game.add_player(user_id, user_id)
+    return game
+
+def time_calls(engine: str, players: int, repeat: int) -> float:
+    """Best time to call all 75 numbers on a fresh room"""
+    best = float("inf")
+    for _ in range(repeat):
+        game = filled_room(engine, players)
+        start = timeit.default_timer()
+        while game.call_next_number():
+            pass
+        best = min(best, timeit.default_timer() - start)
+    return best
+
+def bench_engines(repeat: int = 3):
+    """75 calls with auto-daub and winner detection, per engine backend"""
+    print("🎰 Full draw, auto-daub + winner detection (75 calls)")
+    for players in ENGINE_PLAYER_COUNTS:
+        timings = {}
+        for engine in ENGINES:
+            try:
+                timings[engine] = time_calls(engine, players, repeat)
+            except ImportError as e:
+                print(f"⚠️ Skipping {engine} engine: {e}")
+        if len(timings) == 2:
+            report("draw", players, timings["python"], timings["numpy"],
+                   labels=("python", "numpy"))
+
+def bench_memory():
+    """Traced bytes per seated player (shared cartela registry excluded)"""
+    print("💾 Memory per player (tracemalloc)")
+    for players in MEMORY_PLAYER_COUNTS:
+        tracemalloc.start()
+        game = create_bingo_game("BENCH", 10, players)
+        before = tracemalloc.get_traced_memory()[0]
+        # Seat directly: rooms this big reuse cartelas from the shared pool
+        for user_id in range(1, players + 1):
+            game._register_player(user_id, CARTELAS[user_id % len(CARTELAS) + 1])
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"seats        {players:>7} players  {(after - before) / players:8.1f} bytes/player")
+
+def bench_joins():
+    """Cost of seating a player as the room fills"""
+    print("🪑 Join cost (taken-cartela bitmap)")
+    for players in PLAYER_COUNTS:
+        start = timeit.default_timer()
+        filled_room("python", players)
+        elapsed = timeit.default_timer() - start
+        print(f"fill         {players:>7} players  {elapsed / players * 1e6:8.2f} us/join")
+
+def bench_settle(repeat: int = 3):
+    """Earliest winning call for the whole cartela pool from one draw order"""
+    print(f"🏁 Earliest win over the pool ({len(CARTELAS)} cartelas)")
+    draw_order = draw_sequence(7)
+    python = min(timeit.repeat(lambda: earliest_wins(draw_order), number=1, repeat=repeat))
+    try:
+        from vector_engine import earliest_win_calls
+    except ImportError as e:
+        print(f"⚠️ Skipping numpy engine: {e}")
+        return
+    numpy = min(timeit.repeat(lambda: earliest_win_calls(draw_order), number=1, repeat=repeat))
+    report("settle", len(CARTELAS), python, numpy, labels=("python", "numpy"))
+
+def bench_patterns(players: int = 10_000, repeat: int = 5):
+    """Per-pattern loop vs compiled row tables, for sets of growing size"""
+    print(f"🧩 Pattern set check ({players} cards)")
+    masks = random_masks(players)
+    pattern_sets = list(PATTERN_SETS.values()) + [PatternSet("everything", list(PATTERNS))]
+    for patterns in sorted(pattern_sets, key=lambda p: len(p.masks)):
+        assert [is_winning_mask(m, patterns.masks) for m in masks] == \
+            [patterns.is_win(m) for m in masks]
+        loop = min(timeit.repeat(lambda: [is_winning_mask(m, patterns.masks) for m in masks],
+                                 number=1, repeat=repeat))
+        table = min(timeit.repeat(lambda: [patterns.is_win(m) for m in masks],
+                                  number=1, repeat=repeat))
+        print(f"{patterns.name:<14} {len(patterns.masks):>3} patterns  "
+              f"loop {loop * 1000:8.2f} ms  tables {table * 1000:8.2f} ms")
+
+def bench_scheduler(games: int = 20_000, interval: float = 1.0, seconds: float = 5.0):
+    """One AutoCaller pacing many concurrent games"""
+    from auto_caller import AutoCaller
+    print(f"⏱️ Auto-caller pacing {games} games every {interval}s for {seconds}s")
+    rooms = {}
+    for game_id in range(games):
+        game = create_bingo_game(f"S{game_id}", 10, 2, auto_daub=True, seed=game_id)
+        game.add_player(1, 1)
+        game.add_player(2, 2)
+        rooms[game_id] = game
+
+    caller = AutoCaller(lambda game_id: bool(rooms[game_id].call_next_number()), interval)
+    for game_id in rooms:
+        caller.schedule(game_id, delay=random.random() * interval)
+    time.sleep(seconds)
+    stats = caller.stats()
+    print(f"calls {stats['calls']:>9}  {stats['calls'] / seconds:10.0f} calls/s  "
+          f"(target {games / interval:.0f})  max lag {stats['max_lag'] * 1000:.1f} ms")
+
+BENCHMARKS = {
+    "wins": bench_wins,
+    "engines": bench_engines,
+    "memory": bench_memory,
+    "joins": bench_joins,
+    "settle": bench_settle,
+    "patterns": bench_patterns,
+    "scheduler": bench_scheduler,
+}
+
+if __name__ == "__main__":
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else "all"
+    if command == "all":
+        for bench in BENCHMARKS.values():
+            bench()
+    elif command in BENCHMARKS:
+        BENCHMARKS[command]()
+    else:
+        print(f"Usage: python benchmark.py [{'|'.join(BENCHMARKS)}|all]")
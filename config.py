@@ -31,8 +31,56 @@ GAME_PRICES = [int(x) for x in os.getenv("ENTRY_PRICES", "10,20,50,100").split("
 MIN_WITHDRAWAL = int(os.getenv("MIN_WITHDRAWAL", 100))
 REFERRAL_BONUS = int(os.getenv("REFERRAL_BONUS", 20))
 MAX_PLAYERS = int(os.getenv("MAX_PLAYERS", 100))
-CARTELA_SIZE = 100
+CARTELA_SIZE = int(os.getenv("CARTELA_SIZE", 100))
 BINGO_NUMBERS = 75
+GAME_ENGINE = os.getenv("GAME_ENGINE", "python")  # python, numpy
+# Win pattern set per entry price, e.g. "50:x,100:full_house"; other prices use "line"
+PRICE_PATTERN_SETS = {
+    int(price): name
+    for price, name in (x.split(":") for x in os.getenv("PRICE_PATTERN_SETS", "").split(",") if x)
+}
+
+# Live game store: "memory" (single worker) or "sqlite:///path" (shared by all workers)
+GAME_STORE_URL = os.getenv("GAME_STORE_URL", "memory")
+
+# Write-behind batching of game writes
+WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", 0.5))  # seconds
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", 1000))
+
+# Server-side number calling; 0 leaves calling to clients via POST /game/<id>/call
+AUTO_CALL_INTERVAL = float(os.getenv("AUTO_CALL_INTERVAL", 5))  # seconds between calls
+
+# Eviction of ended and idle games from the live game store
+FINISHED_GAME_TTL = float(os.getenv("FINISHED_GAME_TTL", 300))   # seconds after a game ends
+WAITING_GAME_TTL = float(os.getenv("WAITING_GAME_TTL", 1800))    # idle seconds before cancelling
+MAX_LIVE_GAMES = int(os.getenv("MAX_LIVE_GAMES", 10000))         # LRU cap
+REAP_INTERVAL = float(os.getenv("REAP_INTERVAL", 30))
+
+# Server-Sent Events streams of game events
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", 256))  # events a slow client may fall behind
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", 15))   # seconds between keep-alives
+SSE_CATCHUP = float(os.getenv("SSE_CATCHUP", 1))        # idle seconds before checking the store for events
+
+# Lobby listing cache; dropped early on create/join/start
+LOBBY_CACHE_TTL = float(os.getenv("LOBBY_CACHE_TTL", 2))  # seconds
+
+# Matchmade rooms fill up to MAX_PLAYERS; once one has MIN_PLAYERS it starts after this wait
+MATCHMAKING_FILL_WAIT = float(os.getenv("MATCHMAKING_FILL_WAIT", 30))  # seconds
+
+# Waiting games kept pre-created per entry price; 0 creates every game on request
+GAME_POOL_SIZE = int(os.getenv("GAME_POOL_SIZE", 5))
+
+# Longest a /game/<id>/status long-poll (?wait=) is held open
+STATUS_MAX_WAIT = float(os.getenv("STATUS_MAX_WAIT", 30))  # seconds
+
+# WebSocket gateway (ws_gateway.py)
+WS_PORT = int(os.getenv("WS_PORT", 8765))
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", 256))  # frames a slow client may fall behind
+
+# Game-id sharding (see shard_router.py): this process's shard name and every shard on the ring
+SHARD_NAME = os.getenv("SHARD_NAME", "")
+SHARD_NODES = [x for x in os.getenv("SHARD_NODES", "").split(",") if x]
+SHARD_TOKEN = os.getenv("SHARD_TOKEN", "")  # Shared with the router for ring changes; unset disables them
 
 # Flask Configuration
 FLASK_HOST = "0.0.0.0"
@@ -18,9 +18,11 @@ def init_db(app):
     
     db.init_app(app)
     
-    # Create tables
+    # Create tables, then bring existing ones up to date
     with app.app_context():
-        from models import User, Game, GameParticipant, Transaction
+        from models import User, Game, GameParticipant, GameEvent, Transaction
+        from migrations import migrate
         db.create_all()
+        migrate(db.engine)
     
     return db
\ No newline at end of file
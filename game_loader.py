@@ -0,0 +1,144 @@
+"""
+Rebuild live game state from the database after a restart.
+
+Every waiting/active game is loaded with three queries in total (games,
+their participants, their draw events), regardless of how many games are open.
+The same path loads a single game when a shard takes over ownership of it.
+Unused warm-pool games are released first rather than loaded, since the
+pool refills itself with fresh ones; only those of processes that are gone.
+"""
+
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Sequence
+
+from config import GAME_ENGINE
+from database import db
+from game_logic import CARTELAS, BingoGame, create_bingo_game
+from game_store import GameStore
+from models import Game, GameEvent, GameParticipant
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ('waiting', 'active')
+
+def build_game(row, participants, draws) -> BingoGame:
+    """Rebuild one BingoGame from its games row, participant rows and drawn numbers"""
+    game = create_bingo_game(row.game_code, row.entry_price, row.max_players or 100,
+                             engine=row.engine or GAME_ENGINE, seed=row.draw_seed,
+                             pattern_set=row.pattern_set)
+    game.created_at = row.created_at or game.created_at
+    game.event_seq = row.event_seq or 0
+
+    for participant in participants:
+        if participant.cartela_number in CARTELAS:
+            game._register_player(participant.user_id, CARTELAS[participant.cartela_number])
+    game.prize_pool = game.entry_price * len(game.players)
+
+    # Games from before the event log only have the called_numbers snapshot
+    called_numbers = draws or json.loads(row.called_numbers or '[]')
+    if called_numbers:
+        game.status = 'active'
+        game.started_at = row.started_at or datetime.utcnow()
+        game.replay_calls(called_numbers)
+    # A game that crashed before its first call stays waiting; its owner starts it and logs the draw
+
+    # Re-apply marks (queued by every /mark) through the engine's own validation
+    for participant in participants:
+        board = CARTELAS[participant.cartela_number].board
+        for index in json.loads(participant.marked_numbers or '[]'):
+            game.mark_number(participant.user_id, board[index])
+
+    return game
+
+def release_pooled_games(alive: Callable[[Optional[str]], bool], max_age: float,
+                         owns: Optional[Callable[[int], bool]] = None) -> int:
+    """Cancel unused pooled games whose process is gone; returns how many.
+
+    `alive(pooled_by)` says whether the process holding a game may still be
+    running. Rows it cannot rule out are left alone until they are
+    `max_age` seconds old, so a restart never empties a running process's
+    pool. A pooled game seated before a crash, whose switch to 'waiting'
+    was still queued, becomes an ordinary waiting game instead. `owns`
+    skips games this process does not own.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    pooled = db.session.execute(
+        db.select(Game.id, Game.pooled_by, Game.created_at,
+                  db.select(GameParticipant.id).where(GameParticipant.game_id == Game.id).exists().label('seated'))
+        .where(Game.status == 'pooled')
+    ).all()
+    released = [row for row in pooled
+                if (not owns or owns(row.id)) and (not alive(row.pooled_by) or row.created_at < cutoff)]
+    seated = [row.id for row in released if row.seated]
+    unused = [row.id for row in released if not row.seated]
+    if seated:
+        db.session.execute(db.update(Game).where(Game.id.in_(seated)).values(status='waiting'))
+    if unused:
+        db.session.execute(db.update(Game).where(Game.id.in_(unused))
+                           .values(status='cancelled', finished_at=datetime.utcnow()))
+    db.session.commit()
+    if unused:
+        logger.info(f"Cancelled {len(unused)} unused pooled games")
+    return len(unused)
+
+def load_open_games(store: GameStore, game_ids: Optional[Sequence[int]] = None,
+                    owns: Optional[Callable[[int], bool]] = None,
+                    prepare: Optional[Callable[[int, BingoGame], None]] = None) -> List[int]:
+    """Load waiting/active games missing from the store; returns their ids.
+    
+    `game_ids` limits the load to those games; `owns` skips games this
+    process does not own. `prepare(game_id, game)` runs on each rebuilt game
+    before it is put in the store.
+    """
+    started = time.perf_counter()
+    open_games = [Game.status.in_(OPEN_STATUSES)]
+    if game_ids is not None:
+        open_games.append(Game.id.in_(game_ids))
+
+    games = db.session.execute(
+        db.select(Game.id, Game.game_code, Game.entry_price, Game.max_players, Game.engine,
+                  Game.draw_seed, Game.pattern_set, Game.called_numbers, Game.created_at,
+                  Game.started_at, Game.event_seq)
+        .where(*open_games)
+    ).all()
+    if not games:
+        return []
+
+    participants = defaultdict(list)
+    for participant in db.session.execute(
+        db.select(GameParticipant.game_id, GameParticipant.user_id,
+                  GameParticipant.cartela_number, GameParticipant.marked_numbers)
+        .join(Game, Game.id == GameParticipant.game_id)
+        .where(*open_games)
+        .order_by(GameParticipant.id)
+    ):
+        participants[participant.game_id].append(participant)
+
+    draws = defaultdict(list)
+    for event in db.session.execute(
+        db.select(GameEvent.game_id, GameEvent.number)
+        .join(Game, Game.id == GameEvent.game_id)
+        .where(*open_games, GameEvent.type == 'draw')
+        .order_by(GameEvent.game_id, GameEvent.seq)
+    ):
+        draws[event.game_id].append(event.number)
+
+    loaded = []
+    for row in games:
+        if row.id in store or (owns and not owns(row.id)):
+            continue
+        try:
+            game = build_game(row, participants[row.id], draws[row.id])
+            if prepare:
+                prepare(row.id, game)
+            store.put(row.id, game)
+            loaded.append(row.id)
+        except Exception as e:
+            logger.error(f"Error loading game {row.id}: {str(e)}")
+
+    logger.info(f"Loaded {len(loaded)} open games in {time.perf_counter() - started:.3f}s")
+    return loaded
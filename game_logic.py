@@ -1,56 +1,305 @@
+import importlib
 import random
+import secrets
 import json
+import time
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from types import MappingProxyType
+from typing import List, Dict, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from config import CARTELA_SIZE, MIN_PLAYERS
+
+FREE_INDEX = 12  # Center cell of the 5x5 board
+FREE_MASK = 1 << FREE_INDEX
+
+def _mask(indices) -> int:
+    """Pack board cell indices into a 25-bit mask"""
+    mask = 0
+    for idx in indices:
+        mask |= 1 << idx
+    return mask
+
+def mask_to_indices(mask: int) -> List[int]:
+    """Unpack a 25-bit mask into sorted board cell indices"""
+    return [idx for idx in range(25) if mask >> idx & 1]
+
+def _grid(*rows: str) -> Tuple[int, ...]:
+    """Cell indices marked 'X' in a 5x5 picture"""
+    return tuple(row * 5 + col for row, line in enumerate(rows)
+                 for col, cell in enumerate(line) if cell == 'X')
+
+# Win patterns: name -> board cell indices
+PATTERNS: Dict[str, Tuple[int, ...]] = {
+    **{f'row_{row + 1}': tuple(row * 5 + col for col in range(5)) for row in range(5)},
+    **{f'column_{col + 1}': tuple(row * 5 + col for row in range(5)) for col in range(5)},
+    'diagonal_down': _grid("X....", ".X...", "..X..", "...X.", "....X"),
+    'diagonal_up': _grid("....X", "...X.", "..X..", ".X...", "X...."),
+    'four_corners': _grid("X...X", ".....", ".....", ".....", "X...X"),
+    'x': _grid("X...X", ".X.X.", "..X..", ".X.X.", "X...X"),
+    'stamp_top_left': _grid("XX...", "XX...", ".....", ".....", "....."),
+    'stamp_top_right': _grid("...XX", "...XX", ".....", ".....", "....."),
+    'stamp_bottom_left': _grid(".....", ".....", ".....", "XX...", "XX..."),
+    'stamp_bottom_right': _grid(".....", ".....", ".....", "...XX", "...XX"),
+    'full_house': tuple(range(25)),
+}
+
+# Pattern sets: a card wins once it completes any pattern in its set
+PATTERN_SET_NAMES: Dict[str, Tuple[str, ...]] = {
+    'line': (*(f'row_{n}' for n in range(1, 6)), *(f'column_{n}' for n in range(1, 6)),
+             'diagonal_down', 'diagonal_up', 'four_corners'),
+    'x': ('x',),
+    'four_corners': ('four_corners',),
+    'postage_stamp': ('stamp_top_left', 'stamp_top_right', 'stamp_bottom_left', 'stamp_bottom_right'),
+    'full_house': ('full_house',),
+}
+DEFAULT_PATTERN_SET = 'line'
+
+class PatternSet:
+    """Pattern set compiled into bitmasks and per-row lookup tables.
+    
+    tables[r][bits] is the bitset of patterns whose row-r cells are all
+    covered by `bits`, so a card wins when the AND over its five rows is
+    non-zero: 5 lookups and 4 ANDs however many patterns the set holds.
+    """
+    __slots__ = ('name', 'masks', 'cells', 'tables')
+    
+    def __init__(self, name: str, pattern_names: Sequence[str]):
+        self.name = name
+        self.cells: Tuple[Tuple[int, ...], ...] = tuple(PATTERNS[p] for p in pattern_names)
+        self.masks: Tuple[int, ...] = tuple(_mask(cells) for cells in self.cells)
+        self.tables = tuple(
+            tuple(_mask(i for i, mask in enumerate(self.masks)
+                        if (mask >> row * 5 & 0b11111) & ~bits == 0)
+                  for bits in range(32))
+            for row in range(5)
+        )
+    
+    def is_win(self, mask: int) -> bool:
+        """Whether a marks mask completes any of the set's patterns"""
+        t0, t1, t2, t3, t4 = self.tables
+        return (t0[mask & 31] & t1[mask >> 5 & 31] & t2[mask >> 10 & 31]
+                & t3[mask >> 15 & 31] & t4[mask >> 20 & 31]) != 0
+    
+    def __reduce__(self):
+        # Pickle by name; compiled sets are shared module data
+        return get_pattern_set, (self.name,)
+
+PATTERN_SETS: Mapping[str, PatternSet] = MappingProxyType(
+    {name: PatternSet(name, names) for name, names in PATTERN_SET_NAMES.items()}
+)
+
+def get_pattern_set(name: Optional[str]) -> PatternSet:
+    """Look up a compiled pattern set (the classic line set by default)"""
+    if name is None:
+        name = DEFAULT_PATTERN_SET
+    if name not in PATTERN_SETS:
+        raise ValueError(f"Unknown pattern set: {name}")
+    return PATTERN_SETS[name]
+
+# Classic line patterns (rows, columns, both diagonals, four corners)
+WIN_MASKS: Tuple[int, ...] = PATTERN_SETS[DEFAULT_PATTERN_SET].masks
+WIN_CELLS: Tuple[Tuple[int, ...], ...] = PATTERN_SETS[DEFAULT_PATTERN_SET].cells
+
+NEVER_CALLED = 76  # Call position of a number missing from a draw sequence
+
+def is_winning_mask(mask: int, masks: Sequence[int] = WIN_MASKS) -> bool:
+    """Check a marks mask against every pattern, one at a time"""
+    for pattern in masks:
+        if mask & pattern == pattern:
+            return True
+    return False
+
+class Cartela(NamedTuple):
+    """Immutable 5x5 board plus a number -> cell index lookup"""
+    number: int
+    board: Tuple[int, ...]
+    index: Mapping[int, int]
+
+def _build_cartela(cartela_number: int) -> Cartela:
+    """Generate a 5x5 BINGO board with FREE center"""
+    # Private RNG seeded by cartela number, so boards are reproducible
+    # without touching the process-wide random state
+    rng = random.Random(cartela_number * 12345)  # Arbitrary multiplier for uniqueness
+    
+    # Generate numbers for each column
+    columns = {
+        'B': sorted(rng.sample(range(1, 16), 5)),      # 1-15
+        'I': sorted(rng.sample(range(16, 31), 5)),     # 16-30
+        'N': sorted(rng.sample(range(31, 46), 4)),     # 31-45 (4 numbers, center is FREE)
+        'G': sorted(rng.sample(range(46, 61), 5)),     # 46-60
+        'O': sorted(rng.sample(range(61, 76), 5))      # 61-75
+    }
+    
+    # Build 5x5 grid
+    board = []
+    for row in range(5):
+        for col_idx, col in enumerate(['B', 'I', 'N', 'G', 'O']):
+            if row == 2 and col_idx == 2:  # Center position
+                board.append(0)  # FREE space
+            elif col == 'N' and row > 2:
+                # Adjust index for N column (has only 4 numbers)
+                board.append(columns[col][row-1])
+            else:
+                board.append(columns[col][row])
+    
+    index = {number: idx for idx, number in enumerate(board)}
+    return Cartela(cartela_number, tuple(board), MappingProxyType(index))
+
+# Cartela registry, built once at import: cartela number -> Cartela
+CARTELAS: Mapping[int, Cartela] = MappingProxyType(
+    {n: _build_cartela(n) for n in range(1, CARTELA_SIZE + 1)}
+)
+
+def get_cartela(cartela_number: int) -> Optional[Cartela]:
+    """Look up a cartela in the registry"""
+    return CARTELAS.get(cartela_number)
+
+def new_draw_seed() -> int:
+    """Random per-game draw seed (fits a signed BIGINT column)"""
+    return secrets.randbits(63)
+
+def draw_sequence(seed: int) -> List[int]:
+    """Full 1-75 draw order for a seed, so any game can be replayed"""
+    order = list(range(1, 76))
+    random.Random(seed).shuffle(order)
+    return order
+
+class PlayerCard:
+    """A player's seat in a game.
+    
+    Refers to the shared, immutable Cartela and keeps marks as 25-bit masks.
+    Measured with tracemalloc at 1k/10k/100k players, a seat costs ~370 bytes
+    including its players-dict and number-index entries, against ~1.8 KB for
+    the old per-player dict (python benchmark.py memory).
+    """
+    __slots__ = ('user_id', 'card', 'marked_mask', 'called_mask', 'joined_ts')
+    
+    def __init__(self, user_id: int, card: Cartela):
+        self.user_id = user_id
+        self.card = card
+        self.marked_mask = FREE_MASK  # Center (index 12) is automatically marked as FREE
+        self.called_mask = FREE_MASK  # Cells whose numbers have been called
+        self.joined_ts = time.time()
+    
+    def __getstate__(self):
+        # Pickle the cartela by number; boards are shared registry data
+        return {slot: getattr(self, slot) if slot != 'card' else self.card.number
+                for cls in type(self).__mro__ for slot in getattr(cls, '__slots__', ())}
+    
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, CARTELAS[value] if slot == 'card' else value)
+    
+    @property
+    def cartela_number(self) -> int:
+        return self.card.number
+    
+    @property
+    def cartela(self) -> Tuple[int, ...]:
+        return self.card.board
+    
+    @property
+    def joined_at(self) -> datetime:
+        return datetime.utcfromtimestamp(self.joined_ts)
+
+def call_positions(draw_order: Sequence[int]) -> List[int]:
+    """Number -> 1-based call on which it is drawn (FREE space is 0)"""
+    positions = [NEVER_CALLED] * 76
+    positions[0] = 0
+    for call, number in enumerate(draw_order, 1):
+        positions[number] = call
+    return positions
+
+def earliest_win_call(board: Sequence[int], positions: Sequence[int],
+                      win_cells: Sequence[Sequence[int]] = WIN_CELLS) -> Optional[int]:
+    """Call on which a board first completes a pattern, or None if it never does"""
+    best = min(max(positions[board[idx]] for idx in cells) for cells in win_cells)
+    return best if best != NEVER_CALLED else None
+
+def earliest_wins(draw_order: Sequence[int],
+                  cartela_numbers: Optional[Sequence[int]] = None,
+                  pattern_set: Optional[str] = None) -> Dict[int, Optional[int]]:
+    """Earliest winning call for every cartela (the whole pool by default)"""
+    positions = call_positions(draw_order)
+    win_cells = get_pattern_set(pattern_set).cells
+    if cartela_numbers is None:
+        cartela_numbers = CARTELAS.keys()
+    return {n: earliest_win_call(CARTELAS[n].board, positions, win_cells) for n in cartela_numbers}
+
+def first_winners(draw_order: Sequence[int], seats: Mapping[int, int],
+                  pattern_set: Optional[str] = None) -> Tuple[Optional[int], List[int]]:
+    """Settle a game from its draw order and user_id -> cartela number seats.
+    
+    Returns the call on which the game is won and every user who wins on it,
+    e.g. to re-verify a finished game from its stored called_numbers.
+    """
+    wins = earliest_wins(draw_order, list(seats.values()), pattern_set)
+    calls = [call for call in wins.values() if call is not None]
+    if not calls:
+        return None, []
+    
+    winning_call = min(calls)
+    return winning_call, [user_id for user_id, cartela_number in seats.items()
+                          if wins[cartela_number] == winning_call]
 
 class BingoGame:
-    def __init__(self, game_code: str, entry_price: float, max_players: int = 100):
+    __slots__ = (
+        'game_code', 'entry_price', 'prize_pool', 'players', 'number_index', 'taken_cartelas',
+        'potential_winners', 'auto_daub', 'patterns', 'seed', 'event_seq', 'draw_order', 'calls', 'called_mask',
+        'status', 'winner_id', 'current_number', 'created_at', 'started_at',
+        'finished_at', 'min_players', 'max_players',
+    )
+    
+    def __init__(self, game_code: str, entry_price: float, max_players: int = 100,
+                 auto_daub: bool = False, seed: Optional[int] = None,
+                 pattern_set: Optional[str] = None):
         self.game_code = game_code
         self.entry_price = entry_price
         self.prize_pool = 0.0
-        self.players: Dict[int, Dict] = {}  # user_id -> player data
-        self.called_numbers: List[int] = []
+        self.players: Dict[int, PlayerCard] = {}  # user_id -> seat
+        self.number_index: Dict[int, List[PlayerCard]] = {}  # number -> seats holding it
+        self.taken_cartelas = 0  # Bit n set once cartela n is taken
+        self.potential_winners: Set[int] = set()  # user_ids whose called cells complete a pattern
+        self.auto_daub = auto_daub
+        self.patterns = get_pattern_set(pattern_set)
+        self.seed = seed if seed is not None else new_draw_seed()
+        self.event_seq = 0  # Last game_events sequence written for this game
+        self.draw_order = b''  # Shuffled once at start, one byte per number
+        self.calls = 0  # Numbers called so far (cursor into draw_order)
+        self.called_mask = 0  # Bit n set once number n is called
         self.status = "waiting"  # waiting, active, finished
         self.winner_id = None
         self.current_number = None
         self.created_at = datetime.utcnow()
         self.started_at = None
         self.finished_at = None
-        self.min_players = 2
+        self.min_players = MIN_PLAYERS
         self.max_players = max_players
-        
+    
+    @property
+    def called_numbers(self) -> List[int]:
+        """Called numbers in draw order"""
+        return list(self.draw_order[:self.calls])
+    
+    def is_called(self, number: int) -> bool:
+        return bool(self.called_mask >> number & 1)
+    
+    def is_cartela_taken(self, cartela_number: int) -> bool:
+        return bool(self.taken_cartelas >> cartela_number & 1)
+    
+    def first_free_cartela(self) -> Optional[int]:
+        """Lowest cartela number nobody holds, or None if all are taken"""
+        taken = self.taken_cartelas | 1  # Bit 0 is not a cartela
+        number = (~taken & (taken + 1)).bit_length() - 1
+        return number if number in CARTELAS else None
+    
+    def taken_bitmap(self) -> bytes:
+        """Taken cartelas as a bitmap: cartela n is bit n % 8 of byte n // 8"""
+        return self.taken_cartelas.to_bytes(CARTELA_SIZE // 8 + 1, 'little')
+    
     def generate_cartela(self, cartela_number: int) -> List[int]:
-        """Generate a 5x5 BINGO board with FREE center"""
-        # Set seed for reproducibility based on cartela number
-        seed_value = cartela_number * 12345  # Arbitrary multiplier for uniqueness
-        random.seed(seed_value)
-        
-        # Generate numbers for each column
-        columns = {
-            'B': sorted(random.sample(range(1, 16), 5)),      # 1-15
-            'I': sorted(random.sample(range(16, 31), 5)),     # 16-30
-            'N': sorted(random.sample(range(31, 46), 4)),     # 31-45 (4 numbers, center is FREE)
-            'G': sorted(random.sample(range(46, 61), 5)),     # 46-60
-            'O': sorted(random.sample(range(61, 76), 5))      # 61-75
-        }
-        
-        # Build 5x5 grid
-        board = []
-        for row in range(5):
-            for col_idx, col in enumerate(['B', 'I', 'N', 'G', 'O']):
-                if row == 2 and col_idx == 2:  # Center position
-                    board.append(0)  # FREE space
-                else:
-                    # Get the appropriate number from the column
-                    if col == 'N' and row > 2:
-                        # Adjust index for N column (has only 4 numbers)
-                        board.append(columns[col][row-1])
-                    else:
-                        board.append(columns[col][row])
-        
-        # Reset random seed
-        random.seed()
-        return board
+        """Return a copy of the board for a cartela number"""
+        return list(CARTELAS[cartela_number].board)
     
     def add_player(self, user_id: int, cartela_number: int) -> bool:
         """Add a player to the game"""
@@ -60,21 +309,19 @@ class BingoGame:
         if len(self.players) >= self.max_players:
             return False
         
-        # Check if cartela number is already taken
-        for player in self.players.values():
-            if player['cartela_number'] == cartela_number:
-                return False
+        if user_id in self.players:
+            return False
+        
+        cartela = get_cartela(cartela_number)
+        if cartela is None:
+            return False
         
-        # Generate cartela
-        cartela = self.generate_cartela(cartela_number)
+        # Check if cartela number is already taken
+        if self.is_cartela_taken(cartela_number):
+            return False
         
         # Add player
-        self.players[user_id] = {
-            'cartela_number': cartela_number,
-            'cartela': cartela,
-            'marked': [12],  # Center (index 12) is automatically marked as FREE
-            'joined_at': datetime.utcnow()
-        }
+        self._register_player(user_id, cartela)
         
         # Update prize pool
         self.prize_pool += self.entry_price
@@ -85,6 +332,17 @@ class BingoGame:
         
         return True
     
+    def _register_player(self, user_id: int, cartela: Cartela):
+        """Store a player's seat and index its numbers"""
+        player = PlayerCard(user_id, cartela)
+        self.players[user_id] = player
+        self.taken_cartelas |= 1 << cartela.number
+        
+        # Index every number on the card (FREE space excluded)
+        for idx, number in enumerate(cartela.board):
+            if idx != FREE_INDEX:
+                self.number_index.setdefault(number, []).append(player)
+    
     def start_game(self) -> bool:
         """Start the game"""
         if self.status != "waiting":
@@ -95,6 +353,7 @@ class BingoGame:
         
         self.status = "active"
         self.started_at = datetime.utcnow()
+        self.draw_order = bytes(draw_sequence(self.seed))
         
         # Call first number
         self.call_next_number()
@@ -102,21 +361,16 @@ class BingoGame:
         return True
     
     def call_next_number(self) -> Optional[str]:
-        """Call the next random number"""
+        """Call the next number in the game's draw order"""
         if self.status != "active":
             return None
         
-        # Get available numbers (1-75)
-        available = [n for n in range(1, 76) if n not in self.called_numbers]
-        
-        if not available:
+        if self.calls >= len(self.draw_order):
             self.status = "finished"
             return None
         
-        # Call random number
-        number = random.choice(available)
-        self.called_numbers.append(number)
-        self.current_number = number
+        number = self.draw_order[self.calls]
+        self._record_call(number)
         
         # Format: B-1, I-16, N-31, G-46, O-61
         if 1 <= number <= 15:
@@ -132,71 +386,71 @@ class BingoGame:
         
         return f"{prefix}-{number}"
     
+    def _record_call(self, number: int):
+        self.calls += 1
+        self.called_mask |= 1 << number
+        self.current_number = number
+        self._apply_call(number)
+    
+    def replay_calls(self, called_numbers: Sequence[int]):
+        """Restore a started game's draw from its stored called numbers.
+        
+        Games whose stored calls don't match their seed (e.g. created before
+        seeds were saved) keep those calls and draw the rest in seed order.
+        """
+        order = draw_sequence(self.seed)
+        if order[:len(called_numbers)] != list(called_numbers):
+            called = set(called_numbers)
+            order = list(called_numbers) + [n for n in order if n not in called]
+        
+        self.draw_order = bytes(order)
+        for number in called_numbers:
+            self._record_call(number)
+    
+    def _apply_call(self, number: int):
+        """Update only the cards holding a called number"""
+        for player in self.number_index.get(number, ()):
+            bit = 1 << player.card.index[number]
+            player.called_mask |= bit
+            if self.auto_daub:
+                player.marked_mask |= bit
+            if self.patterns.is_win(player.called_mask):
+                self.potential_winners.add(player.user_id)
+    
     def mark_number(self, user_id: int, number: int) -> bool:
-        """Mark a number on player's cartela"""
-        if user_id not in self.players:
+        """Mark a number on player's cartela; only while the game is active"""
+        if self.status != "active" or user_id not in self.players:
             return False
         
         player = self.players[user_id]
         
         # Check if number is in cartela
-        if number not in player['cartela']:
+        index = player.card.index.get(number)
+        if index is None:
             return False
         
-        # Check if number has been called (except FREE space which is 0)
-        if number != 0 and number not in self.called_numbers:
+        # Check if number has been called (FREE space is always in called_mask)
+        bit = 1 << index
+        if not player.called_mask & bit:
             return False
         
-        # Get index of number in cartela
-        index = player['cartela'].index(number)
-        
         # Mark if not already marked
-        if index not in player['marked']:
-            player['marked'].append(index)
-            return True
+        if player.marked_mask & bit:
+            return False
         
-        return False
+        player.marked_mask |= bit
+        return True
     
     def check_winner(self, user_id: int) -> bool:
         """Check if player has a winning pattern"""
         if user_id not in self.players:
             return False
         
-        player = self.players[user_id]
-        marked_set = set(player['marked'])
-        
-        # Check rows (0-4, 5-9, 10-14, 15-19, 20-24)
-        for row in range(5):
-            indices = [row * 5 + col for col in range(5)]
-            if all(idx in marked_set for idx in indices):
-                return True
-        
-        # Check columns
-        for col in range(5):
-            indices = [row * 5 + col for row in range(5)]
-            if all(idx in marked_set for idx in indices):
-                return True
-        
-        # Check diagonal: top-left to bottom-right
-        diagonal1 = [0, 6, 12, 18, 24]
-        if all(idx in marked_set for idx in diagonal1):
-            return True
-        
-        # Check diagonal: top-right to bottom-left
-        diagonal2 = [4, 8, 12, 16, 20]
-        if all(idx in marked_set for idx in diagonal2):
-            return True
-        
-        # Check four corners
-        corners = [0, 4, 20, 24]
-        if all(idx in marked_set for idx in corners):
-            return True
-        
-        return False
+        return self.patterns.is_win(self.players[user_id].marked_mask)
     
     def declare_winner(self, user_id: int) -> bool:
-        """Declare a winner and end the game"""
-        if user_id not in self.players:
+        """Declare a winner and end the game; a game has one winner, so only an active game can be won"""
+        if self.status != "active" or user_id not in self.players:
             return False
         
         if not self.check_winner(user_id):
@@ -208,14 +462,40 @@ class BingoGame:
         
         return True
     
-    def get_player_cartela(self, user_id: int) -> Optional[List[int]]:
+    def first_winners(self) -> Tuple[Optional[int], List[int]]:
+        """Call on which this game is won, and by whom, straight from the draw order"""
+        seats = {user_id: player.cartela_number for user_id, player in self.players.items()}
+        return first_winners(self.draw_order, seats, self.patterns.name)
+    
+    def get_winners(self) -> List[int]:
+        """Get every player whose marks complete a winning pattern"""
+        return [user_id for user_id, player in self.players.items()
+                if self.patterns.is_win(player.marked_mask)]
+    
+    def get_player_cartela(self, user_id: int) -> Optional[Sequence[int]]:
         """Get player's cartela numbers"""
         if user_id in self.players:
-            return self.players[user_id]['cartela']
+            return self.players[user_id].cartela
         return None
     
     def get_player_marked(self, user_id: int) -> List[int]:
         """Get player's marked positions"""
         if user_id in self.players:
-            return self.players[user_id]['marked']
-        return []
\ No newline at end of file
+            return mask_to_indices(self.players[user_id].marked_mask)
+        return []
+
+# Engine backends selectable per game: name -> "module:class"
+ENGINES = {
+    'python': 'game_logic:BingoGame',
+    'numpy': 'vector_engine:VectorBingoGame',
+}
+
+def create_bingo_game(game_code: str, entry_price: float, max_players: int = 100,
+                      engine: str = 'python', **kwargs) -> BingoGame:
+    """Create a game on the requested engine backend"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown game engine: {engine}")
+    
+    module_name, class_name = ENGINES[engine].split(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)(game_code, entry_price, max_players, **kwargs)
\ No newline at end of file
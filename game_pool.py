@@ -0,0 +1,114 @@
+"""
+Warm pool of pre-created waiting games, and collision-free game codes.
+
+A background thread keeps `size` waiting games per entry price already
+inserted in the database, so creating or matchmaking into a room only
+pops one off a deque. On a shard they are all games the shard owns.
+Pooled rows have status 'pooled' and name the process holding them, so
+they stay out of the live store and the lobby until they are taken; a
+server starting up cancels those whose process is gone.
+
+Game codes are derived from the game's id, so they cannot collide: the id
+is scrambled by an odd multiplier (a bijection modulo 32**width) and
+written in base 32 without look-alike characters (0/O, 1/I).
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from game_logic import BingoGame
+
+logger = logging.getLogger(__name__)
+
+CODE_ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"
+CODE_WIDTH = 5                # 33.5M codes before they grow a character
+CODE_MULTIPLIER = 0x2F1A7C5B  # Odd, so scrambling is reversible
+CODE_OFFSET = 0x15D3E9
+
+def game_code(sequence: int) -> str:
+    """Short unique code for the game with id `sequence`, e.g. 'BK7Q3M'"""
+    width = CODE_WIDTH
+    while sequence >= 32 ** width:
+        width += 1  # Longer codes never equal shorter ones
+    n = (sequence * CODE_MULTIPLIER + CODE_OFFSET) % 32 ** width
+    chars = []
+    for _ in range(width):
+        n, digit = divmod(n, 32)
+        chars.append(CODE_ALPHABET[digit])
+    return 'B' + ''.join(reversed(chars))
+
+class GamePool:
+    def __init__(self, prices: Iterable[int], create: Callable[[int], Tuple[int, BingoGame]],
+                 size: int = 5, interval: float = 5):
+        self.create = create  # price -> (id, game) of a new waiting game in the database
+        self.size = size
+        self.interval = interval
+        self.pools: Dict[int, Deque[Tuple[int, BingoGame]]] = {price: deque() for price in prices}
+        self.wake = threading.Event()
+        self.pid = None
+        self.counters = {
+            'created': 0,  # games pre-created
+            'taken': 0,    # served from the pool
+            'misses': 0,   # pool was empty
+            'errors': 0,
+        }
+
+    def start(self):
+        """Start the refill thread in this process, e.g. after a gunicorn fork"""
+        if self.size > 0 and self.pid != os.getpid():
+            self.pid = os.getpid()
+            threading.Thread(target=self._run, name="game-pool", daemon=True).start()
+
+    def take(self, price: int) -> Optional[Tuple[int, BingoGame]]:
+        """A pre-created (id, game) for the price, or None if its pool is empty"""
+        self.wake.set()
+        try:
+            game = self.pools[price].popleft()  # deque pops are atomic
+        except (KeyError, IndexError):
+            self.counters['misses'] += 1
+            return None
+        self.counters['taken'] += 1
+        return game
+
+    def discard(self, drop: Callable[[int], bool]) -> List[int]:
+        """Remove pooled games whose id `drop` accepts, e.g. after a ring change; returns their ids"""
+        dropped = []
+        for pool in self.pools.values():
+            for _ in range(len(pool)):
+                try:
+                    game = pool.popleft()
+                except IndexError:
+                    break  # Taken meanwhile
+                if drop(game[0]):
+                    dropped.append(game[0])
+                else:
+                    pool.append(game)
+        return dropped
+
+    def refill(self) -> int:
+        """Top every price's pool up to `size`; returns how many games were created"""
+        created = 0
+        for price, pool in self.pools.items():
+            while len(pool) < self.size:
+                pool.append(self.create(price))
+                self.counters['created'] += 1
+                created += 1
+        return created
+
+    def _run(self):
+        while True:
+            self.wake.clear()
+            try:
+                self.refill()
+            except Exception as e:
+                self.counters['errors'] += 1
+                logger.error(f"Error refilling game pool: {str(e)}")
+                time.sleep(self.interval)
+            self.wake.wait(self.interval)
+
+    def stats(self) -> dict:
+        return dict(self.counters, pooled={str(price): len(pool) for price, pool in self.pools.items()})
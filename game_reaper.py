@@ -0,0 +1,103 @@
+"""
+Background reaper that keeps the live game store bounded.
+
+Finished/cancelled games leave memory `finished_ttl` seconds after their
+last use, and waiting games nobody has changed for `waiting_ttl` seconds
+are cancelled. Only writes count as a use, and reaping itself does not.
+Past `max_games`, the least recently used games go first. Active games
+are never evicted. Every game is archived (its final state queued for
+the database) before it is removed from the store, and the whole pass
+is written with one flush at the end.
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+from game_logic import BingoGame
+from game_store import GameStore
+
+logger = logging.getLogger(__name__)
+
+ENDED_STATUSES = ('finished', 'cancelled')
+
+class GameReaper:
+    def __init__(self, store: GameStore, archive: Callable[[int, BingoGame], None],
+                 finished_ttl: float = 300, waiting_ttl: float = 1800,
+                 max_games: int = 10_000, interval: float = 30,
+                 flush: Optional[Callable[[], object]] = None):
+        self.store = store
+        self.archive = archive  # Queues a game's final state
+        self.flush = flush      # Writes everything queued, once per pass
+        self.finished_ttl = finished_ttl
+        self.waiting_ttl = waiting_ttl
+        self.max_games = max_games
+        self.interval = interval
+        self.pid = None
+        self.counters = {
+            'evicted': 0,    # games removed from the store
+            'archived': 0,   # final states written to the database
+            'cancelled': 0,  # idle waiting games cancelled
+            'errors': 0,
+        }
+
+    def start(self):
+        """Start the reaper thread in this process, e.g. after a gunicorn fork"""
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            threading.Thread(target=self._run, name="game-reaper", daemon=True).start()
+
+    def _expired(self, game: BingoGame, idle: float, over_cap: bool) -> bool:
+        if game.status in ENDED_STATUSES:
+            return over_cap or idle >= self.finished_ttl
+        if game.status == 'waiting':
+            return over_cap or idle >= self.waiting_ttl
+        return False  # Active games stay until they end
+
+    def reap(self) -> int:
+        """Evict every expired game once; returns how many were evicted"""
+        games = self.store.lru_game_ids()
+        excess = len(games) - self.max_games
+        min_ttl = min(self.finished_ttl, self.waiting_ttl)
+        now = time.time()
+        evicted = 0
+
+        for game_id, touched in games:
+            idle = now - touched
+            if excess <= 0 and idle < min_ttl:
+                break  # Everything after this was used more recently
+            try:
+                with self.store.update(game_id, touch=False) as game:
+                    if game is None or not self._expired(game, idle, excess > 0):
+                        continue
+                    if game.status == 'waiting':
+                        game.status = 'cancelled'
+                        game.finished_at = datetime.utcnow()
+                        self.counters['cancelled'] += 1
+                    self.archive(game_id, game)
+                    self.counters['archived'] += 1
+                    self.store.delete(game_id)
+            except Exception as e:
+                logger.error(f"Error reaping game {game_id}: {str(e)}")
+                self.counters['errors'] += 1
+                continue
+            evicted += 1
+            excess -= 1
+
+        if evicted and self.flush:
+            self.flush()
+        self.counters['evicted'] += evicted
+        if evicted:
+            logger.info(f"Reaped {evicted} games, {len(games) - evicted} live")
+        return evicted
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.reap()
+
+    def stats(self) -> dict:
+        return dict(self.counters, live=len(self.store.game_ids()))
@@ -0,0 +1,251 @@
+"""
+Storage for live BingoGame state between requests.
+
+MemoryGameStore keeps games in this process (single worker only) and
+serializes update() blocks per game, so threaded workers can mutate
+different games in parallel.
+Both track recency for LRU eviction on writes (put/update) only, so
+reads such as polling or lobby listings never keep an idle game alive.
+SQLiteGameStore keeps pickled games in one SQLite file shared by every
+worker process, so any gunicorn worker can serve any game.
+"""
+
+import time
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from game_logic import BingoGame
+
+class GameStore:
+    """Interface every game store backend implements"""
+
+    def get(self, game_id: int) -> Optional[BingoGame]:
+        """Snapshot of a game for reading, or None"""
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[int, BingoGame]]:
+        """(game_id, snapshot) of every game, lowest id first"""
+        raise NotImplementedError
+
+    def put(self, game_id: int, game: BingoGame):
+        """Add or replace a game"""
+        raise NotImplementedError
+
+    def delete(self, game_id: int):
+        """Remove a game"""
+        raise NotImplementedError
+
+    @contextmanager
+    def update(self, game_id: int, touch: bool = True) -> Iterator[Optional[BingoGame]]:
+        """Yield a game for mutation and save it when the block exits.
+
+        Yields None if the game does not exist. Shared backends hold an
+        exclusive lock for the duration of the block. touch=False leaves
+        the game's last used time alone, e.g. for housekeeping.
+        """
+        raise NotImplementedError
+        yield
+
+    def game_ids(self) -> List[int]:
+        raise NotImplementedError
+
+    def lru_game_ids(self) -> List[Tuple[int, float]]:
+        """(game_id, last used time) pairs, least recently used first"""
+        raise NotImplementedError
+
+    def claim(self, game_id: int, owner: str, ttl: float) -> bool:
+        """Take or renew a game's `ttl`-second lease for `owner` unless another owner holds it.
+
+        False if the game does not exist. Keeps shared games to one number caller.
+        """
+        raise NotImplementedError
+
+    def filling_game(self, price: int) -> Optional[int]:
+        """The matchmaking room currently filling for an entry price, or None"""
+        raise NotImplementedError
+
+    def replace_filling_game(self, price: int, closed_id: Optional[int], game_id: int) -> int:
+        """Make `game_id` the price's filling room if it is still `closed_id`; returns the filling room.
+
+        Every worker sharing the store sees the same filling room per price.
+        """
+        raise NotImplementedError
+
+    def __contains__(self, game_id: int) -> bool:
+        return self.get(game_id) is not None
+
+class MemoryGameStore(GameStore):
+    """Games held as live objects in this process"""
+
+    def __init__(self):
+        self.games: Dict[int, BingoGame] = OrderedDict()  # Least recently used first
+        self.touched: Dict[int, float] = {}
+        self.locks: Dict[int, threading.Lock] = {}  # One per game in the store
+        self.locks_lock = threading.Lock()
+        self.missing_lock = threading.RLock()  # Shared by ids not in the store, e.g. from client URLs
+        self.filling: Dict[int, int] = {}  # price -> matchmaking room
+        self.filling_lock = threading.Lock()
+
+    def _lock(self, game_id: int) -> threading.Lock:
+        lock = self.locks.get(game_id)
+        if lock is None:
+            with self.locks_lock:
+                if game_id not in self.games:
+                    return self.missing_lock
+                lock = self.locks.setdefault(game_id, threading.Lock())
+        return lock
+
+    def _touch(self, game_id: int) -> Optional[BingoGame]:
+        game = self.games.get(game_id)
+        if game is not None:
+            self.games.move_to_end(game_id)
+            self.touched[game_id] = time.time()
+        return game
+
+    def get(self, game_id: int) -> Optional[BingoGame]:
+        return self.games.get(game_id)
+
+    def items(self) -> Iterator[Tuple[int, BingoGame]]:
+        return iter(sorted(list(self.games.items())))
+
+    def put(self, game_id: int, game: BingoGame):
+        self.games[game_id] = game
+        self._touch(game_id)
+
+    def delete(self, game_id: int):
+        self.games.pop(game_id, None)
+        self.touched.pop(game_id, None)
+        self.locks.pop(game_id, None)
+
+    @contextmanager
+    def update(self, game_id: int, touch: bool = True) -> Iterator[Optional[BingoGame]]:
+        while True:
+            lock = self._lock(game_id)
+            with lock:
+                if lock is self.missing_lock and game_id in self.games:
+                    continue  # Added while we waited; use its own lock
+                yield self._touch(game_id) if touch else self.games.get(game_id)
+                return
+
+    def game_ids(self) -> List[int]:
+        return list(self.games)
+
+    def lru_game_ids(self) -> List[Tuple[int, float]]:
+        return [(game_id, self.touched.get(game_id, 0.0)) for game_id in list(self.games)]
+
+    def claim(self, game_id: int, owner: str, ttl: float) -> bool:
+        return game_id in self.games  # Only this process sees these games
+
+    def filling_game(self, price: int) -> Optional[int]:
+        return self.filling.get(price)
+
+    def replace_filling_game(self, price: int, closed_id: Optional[int], game_id: int) -> int:
+        with self.filling_lock:
+            if self.filling.get(price) == closed_id:
+                self.filling[price] = game_id
+            return self.filling[price]
+
+class SQLiteGameStore(GameStore):
+    """Pickled games in a SQLite file shared across worker processes"""
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.local()  # One connection per thread
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS games (game_id INTEGER PRIMARY KEY, state BLOB NOT NULL)")
+            for column in ("touched REAL DEFAULT 0", "caller TEXT", "caller_until REAL DEFAULT 0"):
+                try:
+                    conn.execute(f"ALTER TABLE games ADD COLUMN {column}")
+                except sqlite3.OperationalError:
+                    pass  # Column already exists
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_games_touched ON games (touched)")
+            conn.execute("CREATE TABLE IF NOT EXISTS filling_games (price INTEGER PRIMARY KEY, game_id INTEGER NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            # Autocommit mode; update() opens its own write transaction
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, game_id: int) -> Optional[BingoGame]:
+        row = self._connect().execute(
+            "SELECT state FROM games WHERE game_id = ?", (game_id,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def items(self) -> Iterator[Tuple[int, BingoGame]]:
+        for game_id, state in self._connect().execute("SELECT game_id, state FROM games ORDER BY game_id"):
+            yield game_id, pickle.loads(state)
+
+    def put(self, game_id: int, game: BingoGame):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO games (game_id, state, touched) VALUES (?, ?, ?)",
+            (game_id, pickle.dumps(game, pickle.HIGHEST_PROTOCOL), time.time()))
+
+    def delete(self, game_id: int):
+        self._connect().execute("DELETE FROM games WHERE game_id = ?", (game_id,))
+
+    @contextmanager
+    def update(self, game_id: int, touch: bool = True) -> Iterator[Optional[BingoGame]]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # Exclusive write lock across processes
+        try:
+            row = conn.execute("SELECT state FROM games WHERE game_id = ?", (game_id,)).fetchone()
+            game = pickle.loads(row[0]) if row else None
+            yield game
+            if game is not None:
+                conn.execute("UPDATE games SET state = ?, touched = CASE WHEN ? THEN ? ELSE touched END "
+                             "WHERE game_id = ?",
+                             (pickle.dumps(game, pickle.HIGHEST_PROTOCOL), touch, time.time(), game_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def game_ids(self) -> List[int]:
+        return [row[0] for row in self._connect().execute("SELECT game_id FROM games")]
+
+    def lru_game_ids(self) -> List[Tuple[int, float]]:
+        return self._connect().execute(
+            "SELECT game_id, touched FROM games ORDER BY touched").fetchall()
+
+    def claim(self, game_id: int, owner: str, ttl: float) -> bool:
+        now = time.time()
+        return self._connect().execute(
+            "UPDATE games SET caller = ?, caller_until = ? "
+            "WHERE game_id = ? AND (caller IS NULL OR caller = ? OR caller_until < ?)",
+            (owner, now + ttl, game_id, owner, now)).rowcount == 1
+
+    def filling_game(self, price: int) -> Optional[int]:
+        row = self._connect().execute(
+            "SELECT game_id FROM filling_games WHERE price = ?", (price,)).fetchone()
+        return row[0] if row else None
+
+    def replace_filling_game(self, price: int, closed_id: Optional[int], game_id: int) -> int:
+        conn = self._connect()
+        if closed_id is None:
+            conn.execute("INSERT OR IGNORE INTO filling_games (price, game_id) VALUES (?, ?)", (price, game_id))
+        else:
+            conn.execute("UPDATE filling_games SET game_id = ? WHERE price = ? AND game_id = ?",
+                         (game_id, price, closed_id))
+        return self.filling_game(price)
+
+    def __contains__(self, game_id: int) -> bool:
+        return self._connect().execute(
+            "SELECT 1 FROM games WHERE game_id = ?", (game_id,)).fetchone() is not None
+
+def create_game_store(url: str) -> GameStore:
+    """Build a store from a URL: "memory" or "sqlite:///path/to/file.db" """
+    if url == 'memory':
+        return MemoryGameStore()
+    if url.startswith('sqlite:///'):
+        return SQLiteGameStore(url[len('sqlite:///'):])
+    raise ValueError(f"Unknown game store: {url}")
@@ -0,0 +1,80 @@
+"""
+Cached lobby listing of waiting games, grouped by entry price.
+
+The snapshot is built from the live game store, reused for `ttl` seconds,
+and thrown away early whenever a game is created, joined or started.
+Building it reads games without touching them, so listing a waiting game
+never keeps it from being reaped.
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from game_store import GameStore
+
+class LobbyCache:
+    def __init__(self, store: GameStore, ttl: float = 2.0):
+        self.store = store
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.tiers: Dict[int, List[dict]] = {}  # price -> waiting games, oldest id first
+        self.ids: Dict[int, List[int]] = {}     # price -> those games' ids, for keyset lookups
+        self.version = 0
+        self.built_at = 0.0
+        self.stale = True
+        self.counters = {'hits': 0, 'builds': 0, 'invalidations': 0}
+
+    def invalidate(self):
+        self.stale = True
+        self.counters['invalidations'] += 1
+
+    def snapshot(self) -> Tuple[int, Dict[int, List[dict]], Dict[int, List[int]]]:
+        """(version, games by price, ids by price); rebuilt when stale or past the TTL"""
+        with self.lock:
+            if self.stale or time.monotonic() - self.built_at >= self.ttl:
+                self.stale = False  # Invalidations during the build mark it stale again
+                self.tiers = self._build()
+                self.ids = {price: [game['id'] for game in games] for price, games in self.tiers.items()}
+                self.built_at = time.monotonic()
+                self.version += 1
+                self.counters['builds'] += 1
+            else:
+                self.counters['hits'] += 1
+            return self.version, self.tiers, self.ids
+
+    def _build(self) -> Dict[int, List[dict]]:
+        tiers: Dict[int, List[dict]] = {}
+        for game_id, game in self.store.items():
+            if game.status != 'waiting':
+                continue
+            tiers.setdefault(int(game.entry_price), []).append({
+                'id': game_id,
+                'code': game.game_code,
+                'price': game.entry_price,
+                'players': len(game.players),
+                'max_players': game.max_players,
+                'status': game.status,
+            })
+        return tiers
+
+    def page(self, price: Optional[int] = None, after: int = 0, limit: int = 20) -> Tuple[int, dict]:
+        """(version, keyset page of each tier or one tier: games with id > `after`)"""
+        version, tiers, ids = self.snapshot()
+        prices = [price] if price is not None else sorted(tiers)
+        result = {}
+        for tier_price in prices:
+            games = tiers.get(tier_price, [])
+            start = bisect.bisect_right(ids.get(tier_price, []), after)
+            page = games[start:start + limit]
+            result[str(tier_price)] = {
+                'games': page,
+                'total': len(games),
+                'players': sum(game['players'] for game in games),
+                'next_after': page[-1]['id'] if start + limit < len(games) else None,
+            }
+        return version, result
+
+    def stats(self) -> dict:
+        return dict(self.counters, version=self.version)
@@ -5,7 +5,7 @@ This file is required by Railway's deployment system.
 
 import os
 import logging
-from app import app as flask_app
+from app import app as flask_app, recover_games
 
 # Configure logging for Railway
 logging.basicConfig(
@@ -17,6 +17,9 @@ logger = logging.getLogger(__name__)
 # This creates the 'app' object that Railway expects
 app = flask_app
 
+# gunicorn imports this module to serve, so recover here (once per process)
+recover_games()
+
 if __name__ == "__main__":
     # Get port from environment variable (Railway provides this)
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,65 @@
+"""
+Price-tier matchmaking.
+
+Every entry price keeps one filling game, and players are seated in it
+with a single lookup. A fresh game is opened only once the filling game
+starts or reaches its player limit. Opening is a compare-and-swap in the
+game store, under the tier's lock in this process, so a burst of joins
+that all find the same game closed opens exactly one replacement. The
+filling game lives in the store, so workers sharing a store fill the same
+room; if two workers open a replacement at the same moment, one of the
+two rooms is never used and is reaped as idle.
+"""
+
+import threading
+from typing import Callable, Iterable, Optional, Tuple
+
+from game_store import GameStore
+
+class Matchmaker:
+    def __init__(self, prices: Iterable[int], open_game: Callable[[int], int], store: GameStore):
+        self.open_game = open_game  # price -> id of a new waiting game
+        self.store = store  # Holds each price's filling game
+        self.locks = {price: threading.Lock() for price in prices}
+        self.counters = {'seated': 0, 'opened': 0, 'refused': 0, 'raced': 0}
+
+    def current(self, price: int) -> int:
+        """The tier's filling game, opening the first one if needed"""
+        game_id = self.store.filling_game(price)
+        if game_id is None:
+            game_id = self.rollover(price, None)
+        return game_id
+
+    def rollover(self, price: int, closed_id: Optional[int]) -> int:
+        """Replace the tier's filling game if it is still `closed_id`; returns the current one"""
+        with self.locks[price]:
+            game_id = self.store.filling_game(price)
+            if game_id != closed_id:
+                return game_id  # Another thread or worker already replaced it
+            opened = self.open_game(price)
+            game_id = self.store.replace_filling_game(price, closed_id, opened)
+            self.counters['opened' if game_id == opened else 'raced'] += 1
+            return game_id
+
+    def seat(self, price: int, join: Callable[[int], Tuple[bool, bool]]) -> Optional[int]:
+        """Seat a player in the tier's filling game; returns its id, or None if refused.
+
+        `join(game_id)` tries to seat the player and returns (seated, still open).
+        A closed room means other joins filled it, so retrying always makes progress.
+        """
+        game_id = self.current(price)
+        while True:
+            seated, still_open = join(game_id)
+            if not still_open:
+                self.rollover(price, game_id)
+            if seated:
+                self.counters['seated'] += 1
+                return game_id
+            if still_open:
+                # The room is fine; the player was refused (e.g. cartela taken)
+                self.counters['refused'] += 1
+                return None
+            game_id = self.current(price)
+
+    def stats(self) -> dict:
+        return dict(self.counters, filling={str(price): self.store.filling_game(price) for price in self.locks})
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Schema migrations for existing databases
+Use: python migrations.py  (init_db also runs them at startup)
+
+db.create_all() creates missing tables with all their indexes but never
+alters a table that already exists. Each migration below runs once per
+database, in order, and is recorded in schema_migrations. Steps check
+the live schema first, so on tables create_all() just made they only
+record themselves. Add new steps at the end; never edit an applied one.
+"""
+
+import sys
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect, literal, text
+from sqlalchemy.engine import Connection, Engine
+
+from database import db
+from models import User, Game, GameParticipant, Transaction, SchemaMigration
+
+logger = logging.getLogger(__name__)
+
+def add_column(conn: Connection, column: db.Column):
+    """ALTER TABLE ... ADD COLUMN for a model column the table lacks"""
+    table = column.table.name
+    if column.name in {c['name'] for c in inspect(conn).get_columns(table)}:
+        return
+    quote = conn.dialect.identifier_preparer.quote
+    ddl = f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column.name)} {column.type.compile(conn.dialect)}"
+    if column.default is not None and column.default.is_scalar:
+        default = literal(column.default.arg, column.type).compile(
+            dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+        ddl += f" DEFAULT {default}"
+    conn.execute(text(ddl))
+
+def add_indexes(conn: Connection, table: db.Table, *names: str):
+    """Create the table's named model indexes that the database lacks"""
+    indexes = {index.name: index for index in table.indexes}
+    for name in names:
+        indexes[name].create(conn, checkfirst=True)
+
+def game_engine_columns(conn: Connection):
+    """Replayable draws, pattern sets, engine choice and the event cursor on games"""
+    for name in ('draw_seed', 'pattern_set', 'engine', 'event_seq'):
+        add_column(conn, Game.__table__.c[name])
+
+def hot_query_indexes(conn: Connection):
+    """Indexes behind the lookups in app.py, bot.py and admin_panel.py (see test_query_plans.py)"""
+    add_indexes(conn, User.__table__, 'ix_users_phone', 'ix_users_created_at')
+    add_indexes(conn, Game.__table__, 'ix_games_status', 'ix_games_created_at')
+    add_indexes(conn, GameParticipant.__table__, 'ix_game_participants_user_id')
+    add_indexes(conn, Transaction.__table__, 'idx_type_status')
+
+def pool_owner_column(conn: Connection):
+    """Which process's warm pool holds each pooled game"""
+    add_column(conn, Game.__table__.c.pooled_by)
+
+MIGRATIONS = [
+    (1, game_engine_columns),
+    (2, hot_query_indexes),
+    (3, pool_owner_column),
+]
+
+def applied_versions(conn: Connection) -> set:
+    return set(conn.execute(db.select(SchemaMigration.version)).scalars())
+
+def migrate(engine: Engine) -> list:
+    """Apply every pending migration; returns the names of those applied"""
+    SchemaMigration.__table__.create(engine, checkfirst=True)
+    applied = []
+    for version, step in MIGRATIONS:
+        try:
+            with engine.begin() as conn:
+                if version in applied_versions(conn):
+                    continue
+                step(conn)
+                conn.execute(db.insert(SchemaMigration).values(
+                    version=version, name=step.__name__, applied_at=datetime.utcnow()))
+        except Exception:
+            # Another worker starting at the same time may have applied it first
+            with engine.connect() as conn:
+                if version in applied_versions(conn):
+                    continue
+            raise
+        logger.info(f"Applied migration {version}: {step.__name__}")
+        applied.append(step.__name__)
+    return applied
+
+def main():
+    from flask import Flask
+    from database import init_db
+
+    app = Flask(__name__)
+    init_db(app)  # Runs migrate()
+    with app.app_context():
+        with db.engine.connect() as conn:
+            done = applied_versions(conn)
+    for version, step in MIGRATIONS:
+        print(f"{'✅' if version in done else '⏳'} {version}: {step.__name__}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,13 +9,13 @@ class User(db.Model):
     username = db.Column(db.String(100))
     first_name = db.Column(db.String(100))
     last_name = db.Column(db.String(100))
-    phone = db.Column(db.String(20))
+    phone = db.Column(db.String(20), index=True)  # Deposit webhooks look users up by phone
     balance = db.Column(db.Float, default=0.0)
     games_played = db.Column(db.Integer, default=0)
     games_won = db.Column(db.Integer, default=0)
     referral_code = db.Column(db.String(10), unique=True)
     referrer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -28,16 +28,21 @@ class Game(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     game_code = db.Column(db.String(20), unique=True, nullable=False)
-    status = db.Column(db.String(20), default='waiting')  # waiting, active, finished, cancelled
+    status = db.Column(db.String(20), default='waiting', index=True)  # pooled, waiting, active, finished, cancelled
     entry_price = db.Column(db.Float, nullable=False)
     prize_pool = db.Column(db.Float, default=0.0)
-    called_numbers = db.Column(db.Text, default='[]')  # JSON array of called numbers
+    called_numbers = db.Column(db.Text, default='[]')  # JSON array of called numbers, written once the game ends
     winner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     current_number = db.Column(db.Integer, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    draw_seed = db.Column(db.BigInteger, nullable=True)  # Seed of the shuffled draw order, for replay
+    pattern_set = db.Column(db.String(20), default='line')  # Win pattern set, see game_logic.PATTERN_SETS
+    engine = db.Column(db.String(10), default='python')  # Game engine backend, see game_logic.ENGINES
+    event_seq = db.Column(db.Integer, default=0)  # Sequence of the last game_events row
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     started_at = db.Column(db.DateTime, nullable=True)
     finished_at = db.Column(db.DateTime, nullable=True)
     max_players = db.Column(db.Integer, default=100)
+    pooled_by = db.Column(db.String(80), nullable=True)  # host:pid whose warm pool holds a 'pooled' game
     
     # Relationships
     participants = db.relationship('GameParticipant', backref='game', lazy=True)
@@ -48,7 +53,7 @@ class GameParticipant(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     cartela_number = db.Column(db.Integer, nullable=False)
     cartela_numbers = db.Column(db.Text, nullable=False)  # JSON array of 25 numbers
     marked_numbers = db.Column(db.Text, default='[]')  # JSON array of marked indices
@@ -60,6 +65,21 @@ class GameParticipant(db.Model):
         db.UniqueConstraint('game_id', 'user_id', name='unique_user_per_game'),
     )
 
+class GameEvent(db.Model):
+    __tablename__ = 'game_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)  # 1, 2, 3... per game
+    type = db.Column(db.String(10), nullable=False)  # join, draw, win
+    number = db.Column(db.Integer, nullable=True)  # drawn number, or cartela number for join
+    user_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('game_id', 'seq', name='unique_event_seq_per_game'),
+    )
+
 class Transaction(db.Model):
     __tablename__ = 'transactions'
     
@@ -78,5 +98,13 @@ class Transaction(db.Model):
     # Index for faster queries
     __table_args__ = (
         db.Index('idx_user_status', 'user_id', 'status'),
+        db.Index('idx_type_status', 'type', 'status'),
         db.Index('idx_created_at', 'created_at'),
-    )
\ No newline at end of file
+    )
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+    
+    version = db.Column(db.Integer, primary_key=True)  # See migrations.MIGRATIONS
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False)
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+In-process publish/subscribe of game events for streaming clients.
+
+Every subscriber gets a bounded queue. A subscriber that falls `maxsize`
+events behind is dropped instead of slowing down the publisher; its
+client reconnects with Last-Event-ID and catches up from game_events.
+Only subscribers in the process that publishes a game's events see them,
+so streams must reach the game's owning process (one worker, or the
+shard router). Listeners see every game's events, e.g. to hand them to
+the WebSocket gateway's event loop.
+"""
+
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+class Subscription:
+    __slots__ = ('game_id', 'queue', 'dropped')
+
+    def __init__(self, game_id: int, maxsize: int):
+        self.game_id = game_id
+        self.queue = queue.Queue(maxsize)
+        self.dropped = False
+
+    def get(self, timeout: Optional[float] = None) -> dict:
+        """Next event; raises queue.Empty after `timeout` seconds"""
+        return self.queue.get(timeout=timeout)
+
+class EventBus:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.subscribers: Dict[int, Set[Subscription]] = {}
+        self.listeners: List[Callable[[int, dict], None]] = []
+        self.counters = {
+            'published': 0,  # events published
+            'delivered': 0,  # events queued to subscribers
+            'dropped': 0,    # subscribers dropped for falling behind
+        }
+
+    def subscribe(self, game_id: int) -> Subscription:
+        subscription = Subscription(game_id, self.maxsize)
+        with self.lock:
+            self.subscribers.setdefault(game_id, set()).add(subscription)
+        return subscription
+
+    def listen(self, callback: Callable[[int, dict], None]):
+        """Call `callback(game_id, event)` for every event; it must not block"""
+        self.listeners.append(callback)
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.game_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[subscription.game_id]
+
+    def publish(self, game_id: int, event: dict):
+        """Queue an event for every subscriber of a game without blocking"""
+        self.counters['published'] += 1
+        for callback in self.listeners:
+            callback(game_id, event)
+        for subscription in list(self.subscribers.get(game_id, ())):
+            try:
+                subscription.queue.put_nowait(event)
+                self.counters['delivered'] += 1
+            except queue.Full:
+                subscription.dropped = True
+                self.counters['dropped'] += 1
+                self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        with self.lock:
+            subscribers = sum(len(s) for s in self.subscribers.values())
+        return dict(self.counters, subscribers=subscribers, games=len(self.subscribers))
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Simple runner for Bingo Bot
-Use: python run.py [flask|bot|admin|all]
+Use: python run.py [flask|sharded|gateway|bot|admin|all]
 """
 
 import sys
@@ -14,6 +14,16 @@ def run_flask():
     print("🚀 Starting Flask web app...")
     os.system("python app.py")
 
+def run_sharded():
+    """Run Flask web app as game shards behind a router"""
+    print("🧩 Starting sharded Flask web app...")
+    os.system("python shard_router.py")
+
+def run_gateway():
+    """Run Flask web app with the WebSocket gateway"""
+    print("🔌 Starting Flask web app with WebSocket gateway...")
+    os.system("python ws_gateway.py")
+
 def run_bot():
     """Run Telegram bot"""
     print("🤖 Starting Telegram bot...")
@@ -68,6 +78,10 @@ if __name__ == "__main__":
         command = sys.argv[1].lower()
         if command == "flask":
             run_flask()
+        elif command == "sharded":
+            run_sharded()
+        elif command == "gateway":
+            run_gateway()
         elif command == "bot":
             run_bot()
         elif command == "admin":
@@ -75,7 +89,7 @@ if __name__ == "__main__":
         elif command == "all":
             run_all()
         else:
-            print("Usage: python run.py [flask|bot|admin|all]")
+            print("Usage: python run.py [flask|sharded|gateway|bot|admin|all]")
     else:
         # Default: run all
         run_all()
\ No newline at end of file
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Router in front of several app.py engine shards
+Use: SHARD_TOKEN=<secret> python shard_router.py --shards 4 --port 5000
+
+Each shard is a full app.py process that owns the games a HashRing maps
+to its name. The router forwards /game/<id>/... to the owning shard,
+sends /matchmaking/join for each entry price to one shard picked by the
+same ring, merges /lobby/games from every shard, since each lists only
+its own games, and spreads every other request (create, webhooks)
+round-robin. Shards only create games they own.
+
+Shards join or leave through POST /router/shards and
+DELETE /router/shards/<name>. Every live shard is sent the new ring first
+and hands off the games it no longer owns (written to the database). Only
+then does the router switch, so the new owners rebuild those games from
+the database on their next request. Ring changes, here and on the
+shards, need the X-Shard-Token header to match SHARD_TOKEN.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import hmac
+import argparse
+import itertools
+import threading
+from multiprocessing import Process
+from typing import Dict, List
+
+import requests
+from flask import Flask, Response, jsonify, request
+
+from sharding import HashRing
+
+# Not forwarded between client, router and shard
+HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-length', 'content-encoding', 'host',
+               'proxy-authenticate', 'proxy-authorization', 'te', 'trailers', 'upgrade'}
+
+def merge_lobby(pages: List[dict], limit: int) -> dict:
+    """One /lobby/games page from the same page of every shard"""
+    merged = {}
+    for page in pages:
+        for price, tier in page['tiers'].items():
+            into = merged.setdefault(price, {'games': {}, 'total': 0, 'players': 0, 'more': False})
+            into['games'].update((game['id'], game) for game in tier['games'])
+            into['total'] += tier['total']
+            into['players'] += tier['players']
+            into['more'] = into['more'] or tier['next_after'] is not None
+    tiers = {}
+    for price, tier in merged.items():
+        games = sorted(tier['games'].values(), key=lambda game: game['id'])
+        page = games[:limit]
+        tiers[price] = {
+            'games': page,
+            'total': tier['total'],
+            'players': tier['players'],
+            'next_after': page[-1]['id'] if tier['more'] or len(games) > limit else None,
+        }
+    return {'success': True, 'tiers': tiers}
+
+def create_router(shards: Dict[str, str], token: str) -> Flask:
+    """Router app for shards given as {name: base url}"""
+    router = Flask(__name__)
+    shards = dict(shards)
+    ring = HashRing(shards)
+    http = requests.Session()
+    lock = threading.Lock()
+    round_robin = itertools.cycle(sorted(shards))
+
+    def forward(shard: str) -> Response:
+        url = shards[shard] + request.path
+        if request.query_string:
+            url += '?' + request.query_string.decode()
+        upstream = http.request(
+            request.method, url,
+            headers={k: v for k, v in request.headers if k.lower() not in HOP_HEADERS},
+            data=request.get_data(),
+            allow_redirects=False,
+            stream=True,  # Pass streamed responses (e.g. event streams) straight through
+        )
+        headers = [(k, v) for k, v in upstream.raw.headers.items() if k.lower() not in HOP_HEADERS]
+        return Response(upstream.iter_content(chunk_size=None), upstream.status_code, headers)
+
+    def push_ring(nodes):
+        """Send a ring to every shard; each hands off the games it loses"""
+        for name, url in shards.items():
+            try:
+                http.post(f"{url}/shard/ring", json={'nodes': sorted(nodes)},
+                          headers={'X-Shard-Token': token}, timeout=30)
+            except requests.RequestException as e:
+                router.logger.warning(f"Shard {name} did not take the new ring: {e}")
+
+    @router.route('/game/<int:game_id>', methods=['GET', 'POST'])
+    @router.route('/game/<int:game_id>/<path:rest>', methods=['GET', 'POST'])
+    def game_route(game_id, rest=None):
+        return forward(ring.node_for(game_id))
+
+    @router.route('/matchmaking/join', methods=['POST'])
+    def matchmaking_route():
+        # One shard fills each price's room, so joins for a price never split
+        price = (request.get_json(silent=True) or {}).get('entry_price', 10)
+        try:
+            price = int(price)
+        except (TypeError, ValueError):
+            pass  # Any shard rejects it
+        return forward(ring.node_for(f"price-{price}"))
+
+    @router.route('/lobby/games')
+    def lobby_games():
+        pages, cache_control = [], 'no-cache'
+        for name, url in sorted(shards.items()):
+            try:
+                upstream = http.get(f"{url}/lobby/games", params=request.args, timeout=10)
+                upstream.raise_for_status()
+                pages.append(upstream.json())
+                cache_control = upstream.headers.get('Cache-Control', cache_control)
+            except requests.RequestException as e:
+                router.logger.warning(f"Shard {name} left out of the lobby: {e}")
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        body = json.dumps(merge_lobby(pages, limit), sort_keys=True)
+        etag = 'lobby-' + hashlib.sha1(body.encode()).hexdigest()[:16]
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
+
+    @router.route('/router/shards')
+    def list_shards():
+        return jsonify({'success': True, 'shards': shards, 'ring': ring.nodes})
+
+    @router.route('/router/shards', methods=['POST'])
+    def add_shard():
+        nonlocal round_robin
+        if not hmac.compare_digest(request.headers.get('X-Shard-Token', ''), token):
+            return jsonify({'success': False, 'error': 'Forbidden'}), 403
+        name, url = request.json['name'], request.json['url'].rstrip('/')
+        with lock:
+            shards[name] = url
+            push_ring(ring.nodes + [name])
+            ring.add(name)
+            round_robin = itertools.cycle(sorted(shards))
+        return jsonify({'success': True, 'ring': ring.nodes})
+
+    @router.route('/router/shards/<name>', methods=['DELETE'])
+    def remove_shard(name):
+        nonlocal round_robin
+        if not hmac.compare_digest(request.headers.get('X-Shard-Token', ''), token):
+            return jsonify({'success': False, 'error': 'Forbidden'}), 403
+        with lock:
+            if name not in shards:
+                return jsonify({'success': False, 'error': 'Unknown shard'}), 404
+            # A leaving shard hands off everything; a dead one just stops answering
+            push_ring([n for n in ring.nodes if n != name])
+            ring.remove(name)
+            del shards[name]
+            round_robin = itertools.cycle(sorted(shards))
+        return jsonify({'success': True, 'ring': ring.nodes})
+
+    @router.route('/', defaults={'path': ''}, methods=['GET', 'POST'])
+    @router.route('/<path:path>', methods=['GET', 'POST'])
+    def other_route(path):
+        return forward(next(round_robin))
+
+    return router
+
+def run_shard(name: str, port: int, nodes: list):
+    """Shard process: app.py owning its part of the ring"""
+    os.environ['SHARD_NAME'] = name
+    os.environ['SHARD_NODES'] = ','.join(nodes)
+    from app import app, recover_games
+    recover_games()
+    app.run(host='127.0.0.1', port=port, threaded=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run sharded Bingo engines behind a router")
+    parser.add_argument('--shards', type=int, default=os.cpu_count())
+    parser.add_argument('--port', type=int, default=5000, help="router port; shards use the next ones")
+    args = parser.parse_args(argv)
+    token = os.getenv("SHARD_TOKEN")
+    if not token:
+        parser.error("set SHARD_TOKEN; shards and the router check ring changes against it")
+
+    shards = {f"shard{i}": f"http://127.0.0.1:{args.port + 1 + i}" for i in range(args.shards)}
+    print(f"🧩 Starting {args.shards} shards...")
+    processes = []
+    for i, name in enumerate(shards):
+        proc = Process(target=run_shard, args=(name, args.port + 1 + i, list(shards)), daemon=True)
+        proc.start()
+        processes.append(proc)
+        time.sleep(1)
+
+    # Shards inherit SHARD_TOKEN from this process's environment
+    router = create_router(shards, token)
+    print(f"🚦 Router on http://0.0.0.0:{args.port} -> {', '.join(shards.values())}")
+    router.run(host='0.0.0.0', port=args.port, threaded=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
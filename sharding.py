@@ -0,0 +1,39 @@
+"""
+Consistent hashing of game ids onto engine shards.
+
+Each shard gets `replicas` points on a hash ring, and a game belongs to
+the first point at or after its own hash. Adding or removing a shard only
+moves the games between it and its ring neighbours (about 1/N of them).
+"""
+
+import bisect
+import hashlib
+from typing import Iterable, Optional
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+class HashRing:
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 100):
+        self.replicas = replicas
+        self.set_nodes(nodes)
+
+    def set_nodes(self, nodes: Iterable[str]):
+        self.nodes = sorted(set(nodes))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(self.replicas))
+        self.hashes = [point for point, _ in points]
+        self.owners = [node for _, node in points]
+
+    def add(self, node: str):
+        self.set_nodes(self.nodes + [node])
+
+    def remove(self, node: str):
+        self.set_nodes(n for n in self.nodes if n != node)
+
+    def node_for(self, game_id: int) -> Optional[str]:
+        """Shard that owns a game, or None if the ring is empty"""
+        if not self.hashes:
+            return None
+        i = bisect.bisect(self.hashes, _hash(str(game_id))) % len(self.hashes)
+        return self.owners[i]
+
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Offline Monte Carlo simulator for Bingo games
+Use: python -m simulate --games 1000000 --seed 42 --out sim
+
+Plays games with the real game_logic rules (auto-daub, first completed
+pattern wins) across all cores and writes aggregated histograms to
+<out>.json and <out>.csv. Results depend only on the arguments, so a run
+can be reproduced exactly and doubles as an engine throughput benchmark.
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+from multiprocessing import Pool
+
+from config import MIN_PLAYERS, MAX_PLAYERS, GAME_PRICES, CARTELA_SIZE
+from game_logic import BingoGame, DEFAULT_PATTERN_SET, PATTERN_SETS
+
+def play_game(seed: str, players: int = None, pattern_set: str = None) -> tuple:
+    """Play one game; returns (entry price, players, calls, winners)"""
+    rng = random.Random(seed)
+    price = rng.choice(GAME_PRICES)
+    if players is None:
+        players = rng.randint(MIN_PLAYERS, min(MAX_PLAYERS, CARTELA_SIZE))
+
+    game = BingoGame("SIM", price, players, auto_daub=True, seed=rng.getrandbits(63),
+                     pattern_set=pattern_set)
+    game.min_players = players + 1  # Seat everyone before the first call
+    for user_id, cartela_number in enumerate(rng.sample(range(1, CARTELA_SIZE + 1), players)):
+        game.add_player(user_id, cartela_number)
+    game.min_players = players
+    game.start_game()
+
+    while not game.potential_winners and game.call_next_number():
+        pass
+
+    return price, players, game.calls, len(game.potential_winners)
+
+def new_stats() -> dict:
+    return {
+        'games': 0,
+        'calls': Counter(),    # calls until first win -> games
+        'winners': Counter(),  # simultaneous winners -> games
+        'tiers': {},           # price -> [games, payout sum, payout sum of squares]
+    }
+
+def merge_stats(total: dict, part: dict):
+    total['games'] += part['games']
+    total['calls'].update(part['calls'])
+    total['winners'].update(part['winners'])
+    for price, values in part['tiers'].items():
+        tier = total['tiers'].setdefault(price, [0, 0.0, 0.0])
+        for i, value in enumerate(values):
+            tier[i] += value
+
+def run_chunk(args: tuple) -> dict:
+    """Play games [start, stop) of a run; worker entry point"""
+    seed, start, stop, players, pattern_set = args
+    stats = new_stats()
+    for game_index in range(start, stop):
+        price, seated, calls, winners = play_game(f"{seed}:{game_index}", players, pattern_set)
+        payout = price * seated / winners if winners else 0.0
+        stats['games'] += 1
+        stats['calls'][calls] += 1
+        stats['winners'][winners] += 1
+        tier = stats['tiers'].setdefault(price, [0, 0.0, 0.0])
+        tier[0] += 1
+        tier[1] += payout
+        tier[2] += payout * payout
+    return stats
+
+def summarize(stats: dict, seed: int, pattern_set: str, elapsed: float) -> dict:
+    tiers = {}
+    for price, (games, total, squares) in sorted(stats['tiers'].items()):
+        mean = total / games
+        tiers[str(price)] = {
+            'games': games,
+            'mean_payout': mean,
+            'payout_variance': squares / games - mean * mean,
+        }
+    games = stats['games']
+    return {
+        'seed': seed,
+        'pattern_set': pattern_set,
+        'games': games,
+        'mean_calls': sum(k * v for k, v in stats['calls'].items()) / games if games else 0,
+        'multi_winner_rate': (games - stats['winners'][1] - stats['winners'][0]) / games if games else 0,
+        'calls': {str(k): v for k, v in sorted(stats['calls'].items())},
+        'winners': {str(k): v for k, v in sorted(stats['winners'].items())},
+        'tiers': tiers,
+        'elapsed_seconds': elapsed,
+        'games_per_second': games / elapsed if elapsed else 0,
+    }
+
+def write_results(summary: dict, out: str):
+    """Write <out>.json and a flat <out>.csv (metric, key, value)"""
+    with open(f"{out}.json", 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    with open(f"{out}.csv", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['metric', 'key', 'value'])
+        for metric in ('calls', 'winners'):
+            for key, value in summary[metric].items():
+                writer.writerow([metric, key, value])
+        for price, tier in summary['tiers'].items():
+            for key, value in tier.items():
+                writer.writerow([f"tier_{price}", key, value])
+
+def simulate(games: int, seed: int, workers: int = None, players: int = None,
+             chunk: int = 1000, out: str = None, report_every: int = 10,
+             pattern_set: str = DEFAULT_PATTERN_SET) -> dict:
+    """Run `games` games on a process pool, streaming snapshots to `out`"""
+    chunks = [(seed, start, min(start + chunk, games), players, pattern_set)
+              for start in range(0, games, chunk)]
+    total = new_stats()
+    started = time.perf_counter()
+
+    with Pool(workers or os.cpu_count()) as pool:
+        # imap keeps chunk order, so every snapshot is reproducible too
+        for done, part in enumerate(pool.imap(run_chunk, chunks), 1):
+            merge_stats(total, part)
+            if out and (done % report_every == 0 or done == len(chunks)):
+                write_results(summarize(total, seed, pattern_set, time.perf_counter() - started), out)
+
+    return summarize(total, seed, pattern_set, time.perf_counter() - started)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo Bingo simulator")
+    parser.add_argument('--games', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="default: all cores")
+    parser.add_argument('--players', type=int, default=None,
+                        help=f"fixed room size (default: random {MIN_PLAYERS}-{MAX_PLAYERS})")
+    parser.add_argument('--patterns', default=DEFAULT_PATTERN_SET, choices=sorted(PATTERN_SETS),
+                        help="win pattern set")
+    parser.add_argument('--chunk', type=int, default=1000, help="games per worker task")
+    parser.add_argument('--out', default='simulation', help="output path prefix")
+    args = parser.parse_args(argv)
+
+    print(f"🎲 Simulating {args.games:,} games (seed={args.seed}, patterns={args.patterns})...")
+    summary = simulate(args.games, args.seed, args.workers, args.players, args.chunk, args.out,
+                       pattern_set=args.patterns)
+
+    print(f"✅ {summary['games']:,} games in {summary['elapsed_seconds']:.1f}s "
+          f"({summary['games_per_second']:,.0f} games/s)")
+    print(f"📊 Mean calls to first win: {summary['mean_calls']:.2f}")
+    print(f"👥 Games with several winners: {summary['multi_winner_rate']:.2%}")
+    for price, tier in summary['tiers'].items():
+        print(f"💰 {price} Birr: mean payout {tier['mean_payout']:.2f}, "
+              f"variance {tier['payout_variance']:.2f}")
+    print(f"📁 Results: {args.out}.json, {args.out}.csv")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Stress tests for per-game locking and matchmaking.
+Use: python test_concurrency.py
+
+Threads hammer a shared set of games with joins, calls, marks and win
+claims through GameStore.update(), then every game is checked for
+double-taken cartelas, double starts and double winners. Run directly, it
+also compares throughput against one global lock, with a short sleep in
+each update standing in for the database work routes do under the lock.
+
+A burst of matchmaking joins must fill rooms in order, with no duplicate
+or half-empty rooms, and the warm game pool must never hand out a game or
+game code twice.
+"""
+
+import time
+import random
+import itertools
+import threading
+from collections import Counter
+
+from game_logic import BingoGame, CARTELAS
+from game_store import GameStore, MemoryGameStore, SQLiteGameStore
+from matchmaking import Matchmaker
+from game_pool import CODE_WIDTH, GamePool, game_code
+
+GAMES = 20
+ROOM = 50
+THREAD_COUNTS = [1, 2, 4, 8]
+IO_DELAY = 0.0002  # seconds
+RESULTS_LOCK = threading.Lock()
+
+class GlobalLockStore(MemoryGameStore):
+    """Baseline: every game shares one lock"""
+
+    def _lock(self, game_id: int) -> threading.Lock:
+        return self.locks_lock
+
+def new_store(games: int = GAMES, store_class=MemoryGameStore) -> MemoryGameStore:
+    store = store_class()
+    for game_id in range(games):
+        game = BingoGame(f"T{game_id}", 10, ROOM, seed=game_id)
+        game.min_players = ROOM  # Start on the last seat, so joins race the start
+        store.put(game_id, game)
+    return store
+
+def worker(store: MemoryGameStore, thread_index: int, ops: int, results: Counter,
+           io_delay: float = 0.0):
+    rng = random.Random(thread_index)
+    cartelas = list(CARTELAS)
+    local = Counter()
+    for op in range(ops):
+        game_id = rng.randrange(GAMES)
+        user_id = thread_index * ops + op
+        with store.update(game_id) as game:
+            if game.status == 'waiting':
+                if game.add_player(user_id, rng.choice(cartelas)):
+                    local['joins', game_id] += 1
+            elif game.status == 'active':
+                if rng.random() < 0.5:
+                    if game.call_next_number():
+                        local['calls', game_id] += 1
+                else:
+                    # Mark everything called for a random player and claim a win
+                    player = rng.choice(list(game.players.values()))
+                    for number in game.called_numbers:
+                        game.mark_number(player.user_id, number)
+                    if game.declare_winner(player.user_id):
+                        local['wins', game_id] += 1
+            if io_delay:
+                time.sleep(io_delay)
+    with RESULTS_LOCK:
+        results.update(local)
+
+def run(threads: int, ops: int = 4000, io_delay: float = 0.0,
+        store_class=MemoryGameStore) -> tuple:
+    """Run `threads` workers against fresh games; returns (store, results, seconds)"""
+    store = new_store(store_class=store_class)
+    results = Counter()
+    workers = [threading.Thread(target=worker, args=(store, i, ops // threads, results, io_delay))
+               for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return store, results, time.perf_counter() - started
+
+def check(store: MemoryGameStore, results: Counter):
+    for game_id in store.game_ids():
+        game = store.get(game_id)
+        cartelas = [player.cartela_number for player in game.players.values()]
+
+        assert len(cartelas) == len(set(cartelas)) == results['joins', game_id]
+        assert bin(game.taken_cartelas).count('1') == len(cartelas)
+        assert game.prize_pool == game.entry_price * len(cartelas)
+        assert len(cartelas) <= game.max_players
+
+        # start_game draws one number; a double start would draw two
+        started = 1 if game.status != 'waiting' else 0
+        assert game.calls == started + results['calls', game_id]
+        assert bin(game.called_mask).count('1') == game.calls
+
+        assert results['wins', game_id] <= 1
+        assert (game.winner_id is not None) == (results['wins', game_id] == 1)
+
+def test_concurrent_games():
+    for threads in THREAD_COUNTS:
+        store, results, _ = run(threads)
+        check(store, results)
+
+def test_missing_games_share_a_lock():
+    store = new_store()
+    for game_id in range(10_000, 20_000):
+        with store.update(game_id) as game:
+            assert game is None
+    assert len(store.locks) <= GAMES
+
+def join(store: GameStore, user_id: int):
+    """Matchmaker join callback seating `user_id` on the first free cartela"""
+    def attempt(game_id: int) -> tuple:
+        with store.update(game_id) as game:
+            if game.status != 'waiting' or len(game.players) >= game.max_players:
+                return False, False
+            seated = game.add_player(user_id, game.first_free_cartela())
+            return seated, game.status == 'waiting' and len(game.players) < game.max_players
+    return attempt
+
+def matchmaking_burst(threads: int, joins: int = 5000) -> tuple:
+    """Seat `joins` players from `threads` threads; returns (store, matchmaker, seconds)"""
+    store = MemoryGameStore()
+    opened = iter(range(1, joins + 1))
+
+    def open_game(price: int) -> int:
+        game_id = next(opened)
+        game = BingoGame(f"M{game_id}", price, ROOM, seed=game_id)
+        game.min_players = ROOM  # Fills to the player limit, as app.open_tier_game() sets up
+        store.put(game_id, game)
+        return game_id
+
+    matchmaker = Matchmaker([10], open_game, store)
+
+    def worker(users: range):
+        for user_id in users:
+            assert matchmaker.seat(10, join(store, user_id)) is not None
+
+    per_thread = joins // threads
+    workers = [threading.Thread(target=worker, args=(range(i * per_thread, (i + 1) * per_thread),))
+               for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return store, matchmaker, time.perf_counter() - started
+
+def check_matchmaking(store: MemoryGameStore, matchmaker: Matchmaker, joins: int):
+    rooms = sorted(store.game_ids())
+    seated = [len(store.get(game_id).players) for game_id in rooms]
+    assert sum(seated) == joins
+    # Every room but the filling one is full, and the filling one is the newest
+    assert all(count == ROOM for count in seated[:-1])
+    assert store.filling_game(10) == rooms[-1]
+    assert len(rooms) == joins // ROOM + 1
+
+def test_matchmaking_burst():
+    for threads in THREAD_COUNTS:
+        store, matchmaker, _ = matchmaking_burst(threads)
+        check_matchmaking(store, matchmaker, 5000 // threads * threads)
+
+def test_workers_share_filling_rooms(tmp_path):
+    # Two workers: their own store handles and matchmakers, one SQLite file
+    path = str(tmp_path / 'games.db')
+    stores = [SQLiteGameStore(path) for _ in range(2)]
+    opened = itertools.count(1)
+
+    def opener(store: GameStore):
+        def open_game(price: int) -> int:
+            game_id = next(opened)
+            game = BingoGame(f"S{game_id}", price, ROOM, seed=game_id)
+            game.min_players = ROOM
+            store.put(game_id, game)
+            return game_id
+        return open_game
+
+    matchmakers = [Matchmaker([10], opener(store), store) for store in stores]
+
+    def worker(index: int):
+        store, matchmaker = stores[index % 2], matchmakers[index % 2]
+        for user_id in range(index * 100, (index + 1) * 100):
+            assert matchmaker.seat(10, join(store, user_id)) is not None
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    # 400 joins fill 8 rooms exactly; a replacement opened by the worker that lost a race is never seated
+    games = dict(stores[0].items())
+    seated = [len(game.players) for game in games.values() if game.players]
+    assert seated == [ROOM] * 8
+    filling = stores[0].filling_game(10)
+    assert filling == stores[1].filling_game(10) and not games[filling].players
+
+def test_warm_pool():
+    sequence = itertools.count(1)
+
+    def create(price: int) -> tuple:
+        game_id = next(sequence)
+        return game_id, BingoGame(game_code(game_id), price, ROOM, seed=game_id)
+
+    pool = GamePool([10, 20], create, size=20)
+    pool.refill()
+    taken = []
+
+    def worker():
+        for _ in range(200):
+            game = pool.take(10) or create(10)  # Fall back like new_game does
+            with RESULTS_LOCK:
+                taken.append(game)
+
+    workers = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in workers:
+        thread.start()
+    for _ in range(20):
+        pool.refill()  # Refills race the takes
+    for thread in workers:
+        thread.join()
+
+    ids = [game_id for game_id, _ in taken]
+    assert len(set(ids)) == len(ids) == 1600
+    assert len({game.game_code for _, game in taken}) == 1600
+    assert pool.counters['taken'] + pool.counters['misses'] == 1600
+    assert len(pool.pools[20]) == 20
+
+    # Codes stay unique where they grow a character
+    edge = range(32 ** CODE_WIDTH - 5000, 32 ** CODE_WIDTH + 5000)
+    assert len({game_code(n) for n in edge}) == len(edge)
+
+if __name__ == "__main__":
+    print("🔒 Per-game locking stress test")
+    print("=" * 50)
+    for threads in THREAD_COUNTS:
+        rates = []
+        for store_class in (MemoryGameStore, GlobalLockStore):
+            store, results, elapsed = run(threads, io_delay=IO_DELAY, store_class=store_class)
+            check(store, results)
+            rates.append(4000 / elapsed)
+        print(f"✅ {threads} threads: per-game locks {rates[0]:8,.0f} ops/s   "
+              f"global lock {rates[1]:8,.0f} ops/s")
+
+    print("\n🎯 Matchmaking burst")
+    print("=" * 50)
+    for threads in THREAD_COUNTS:
+        store, matchmaker, elapsed = matchmaking_burst(threads)
+        joins = 5000 // threads * threads
+        check_matchmaking(store, matchmaker, joins)
+        print(f"✅ {threads} threads: {joins / elapsed:10,.0f} joins/s into {len(store.game_ids())} rooms")
@@ -0,0 +1,51 @@
+"""
+Idle waiting games must be reaped even while they are being read.
+Use: python -m pytest test_game_reaper.py
+
+Lobby rebuilds and status polls only read games, so they must not count
+as a use; only joins and other writes keep a waiting game alive.
+"""
+
+import time
+
+import pytest
+
+from game_logic import BingoGame
+from game_store import MemoryGameStore, SQLiteGameStore
+from game_reaper import GameReaper
+from lobby import LobbyCache
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryGameStore()
+    return SQLiteGameStore(str(tmp_path / 'games.db'))
+
+def test_reads_do_not_keep_waiting_games_alive(store):
+    for game_id in (1, 2):
+        store.put(game_id, BingoGame(f"R{game_id}", 10, 50, seed=game_id))
+    archived = []
+    reaper = GameReaper(store, lambda game_id, game: archived.append((game_id, game.status)),
+                        finished_ttl=0.2, waiting_ttl=0.2)
+    lobby = LobbyCache(store, ttl=0)
+
+    time.sleep(0.25)
+    with store.update(2) as game:
+        game.add_player(7, game.first_free_cartela())  # A join is a use
+    assert lobby.page()[1]['10']['total'] == 2
+    assert store.get(1) is not None
+
+    assert reaper.reap() == 1
+    assert archived == [(1, 'cancelled')]
+    assert sorted(store.game_ids()) == [2]
+
+def test_one_flush_per_pass(store):
+    for game_id in range(1, 51):
+        store.put(game_id, BingoGame(f"F{game_id}", 10, 50, seed=game_id))
+    flushes = []
+    reaper = GameReaper(store, lambda game_id, game: None, waiting_ttl=3600, max_games=10,
+                        flush=lambda: flushes.append(True))
+
+    assert reaper.reap() == 40  # Over the cap, so the 40 least recently used go
+    assert len(flushes) == 1
+    assert reaper.reap() == 0 and len(flushes) == 1
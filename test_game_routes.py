@@ -0,0 +1,79 @@
+"""
+Game routes end to end through the Flask test client.
+Use: python -m pytest test_game_routes.py
+
+app.py is imported against a throwaway SQLite database, with numbers
+called by hand (AUTO_CALL_INTERVAL=0), no warm pool and a short
+matchmaking fill wait.
+"""
+
+import os
+import time
+import importlib
+
+import pytest
+
+import config
+from game_logic import CARTELAS
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp('routes') / 'routes.db'
+    env = {'DATABASE_URL': f"sqlite:///{db_path}", 'AUTO_CALL_INTERVAL': '0', 'GAME_POOL_SIZE': '0',
+           'MATCHMAKING_FILL_WAIT': '0.3'}
+    previous = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        importlib.reload(config)  # Other test modules may have loaded it already
+        yield importlib.import_module('app')
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def player(app_module, user_id: int):
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+def test_finished_game_has_one_winner(app_module):
+    with app_module.app.app_context():
+        game_id, _ = app_module.new_game(10.0)
+    first, second = player(app_module, 111), player(app_module, 222)
+    for client, cartela in ((first, 1), (second, 2)):
+        assert client.post(f'/game/{game_id}/join', json={'cartela_number': cartela}).json['success']
+
+    called = []
+    while len(called) < 75:  # Every number out, so both cartelas can complete a pattern
+        called = first.post(f'/game/{game_id}/call').json['called_numbers']
+
+    for number in CARTELAS[1].board:
+        response = first.post(f'/game/{game_id}/mark', json={'number': number})
+        if response.json.get('winner'):
+            break
+    else:
+        pytest.fail("first player never won")
+
+    for number in CARTELAS[2].board:
+        response = second.post(f'/game/{game_id}/mark', json={'number': number})
+        assert response.status_code == 400 and not response.json.get('winner')
+
+    game = app_module.game_store.get(game_id)
+    assert game.status == 'finished' and game.winner_id == 111
+    events = first.get(f'/game/{game_id}/events').json['events']
+    assert [event['user_id'] for event in events if event['type'] == 'win'] == [111]
+
+def test_matchmade_room_fills_past_min_players(app_module):
+    joined = [player(app_module, 300 + i).post('/matchmaking/join', json={'entry_price': 20}).json
+              for i in range(3)]
+    room = joined[0]['game_id']
+    assert [result['game_id'] for result in joined] == [room] * 3
+    assert app_module.game_store.get(room).status == 'waiting'  # MIN_PLAYERS is 2
+
+    time.sleep(0.6)  # The fill wait runs out
+    assert app_module.game_store.get(room).status == 'active'
+    late = player(app_module, 399).post('/matchmaking/join', json={'entry_price': 20}).json
+    assert late['success'] and late['game_id'] != room
@@ -0,0 +1,165 @@
+"""
+Query-plan checks for the hot lookups in app.py, bot.py and admin_panel.py.
+Use: python -m pytest test_query_plans.py
+     (TEST_POSTGRES_URL=postgresql://... also checks PostgreSQL, in a throwaway schema)
+
+Seeds a database through init_db, so migrations run, then EXPLAINs each
+query below and fails if any of them scans a whole table. PostgreSQL runs
+with enable_seqscan off, so a Seq Scan there means no index could serve
+the query. Admin listings of every row and plain counts scan by design and
+are left out.
+"""
+
+import os
+import re
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from database import db, init_db
+from models import User, Game, GameParticipant, GameEvent, Transaction
+
+USERS = 2000
+GAMES = 500
+
+HOT_QUERIES = {
+    'app.py deposit_webhook: user by phone':
+        lambda: db.select(User).filter_by(phone='0911000042').limit(1),
+    'app.py game_events: events after a sequence':
+        lambda: db.select(GameEvent).where(GameEvent.game_id == 7, GameEvent.seq > 3)
+                  .order_by(GameEvent.seq).limit(500),
+    'app.py archive_game: participant marks':
+        lambda: db.update(GameParticipant).where(GameParticipant.game_id == 7, GameParticipant.user_id == 42)
+                  .values(marked_numbers='[]'),
+    'app.py load_games: open games':
+        lambda: db.select(Game.id, Game.game_code).where(Game.status.in_(('waiting', 'active'))),
+    'app.py load_games: players of open games':
+        lambda: db.select(GameParticipant.game_id, GameParticipant.user_id)
+                  .join(Game, Game.id == GameParticipant.game_id)
+                  .where(Game.status.in_(('waiting', 'active'))),
+    'game_loader.py release_pooled_games: unused pooled games':
+        lambda: db.select(Game.id, Game.pooled_by, Game.created_at,
+                          db.select(GameParticipant.id).where(GameParticipant.game_id == Game.id).exists())
+                  .where(Game.status == 'pooled'),
+    'bot.py: user by telegram id':
+        lambda: db.select(User).filter_by(telegram_id=500042).limit(1),
+    'bot.py start: referrer by code':
+        lambda: db.select(User).filter_by(referral_code='REF42').limit(1),
+    'bot.py show_balance: recent transactions':
+        lambda: db.select(Transaction).filter_by(user_id=42).order_by(Transaction.created_at.desc()).limit(5),
+    'models.py User.game_participations: games a user played':
+        lambda: db.select(GameParticipant).filter_by(user_id=42),
+    'admin_panel.py dashboard: active games':
+        lambda: db.select(db.func.count()).select_from(Game).filter_by(status='active'),
+    'admin_panel.py dashboard: completed deposits':
+        lambda: db.select(db.func.sum(Transaction.amount))
+                  .where(Transaction.type == 'deposit', Transaction.status == 'completed'),
+    'admin_panel.py dashboard: pending withdrawals':
+        lambda: db.select(Transaction).filter_by(type='withdrawal', status='pending')
+                  .order_by(Transaction.created_at.desc()),
+    'admin_panel.py dashboard: recent games':
+        lambda: db.select(Game).order_by(Game.created_at.desc()).limit(10),
+    'admin_panel.py dashboard: players of a recent game':
+        lambda: db.select(GameParticipant).filter_by(game_id=7),
+    'admin_panel.py dashboard: recent users':
+        lambda: db.select(User).order_by(User.created_at.desc()).limit(10),
+}
+
+def seed():
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    db.session.execute(db.insert(User), [{
+        'id': i, 'telegram_id': 500000 + i, 'phone': f"0911{i:06d}", 'referral_code': f"REF{i}",
+        'balance': 100.0, 'created_at': now - timedelta(minutes=i),
+    } for i in range(1, USERS + 1)])
+    db.session.execute(db.insert(Game), [{
+        'id': i, 'game_code': f"T{i}", 'entry_price': rng.choice([10, 20, 50, 100]),
+        'status': rng.choices(['finished', 'cancelled', 'waiting', 'active'], [80, 10, 5, 5])[0],
+        'created_at': now - timedelta(minutes=i),
+    } for i in range(1, GAMES + 1)])
+    participants, events = [], []
+    for game_id in range(1, GAMES + 1):
+        players = rng.sample(range(1, USERS + 1), 10)
+        for seq, user_id in enumerate(players, 1):
+            participants.append({'game_id': game_id, 'user_id': user_id, 'cartela_number': seq,
+                                 'cartela_numbers': json.dumps(list(range(25)))})
+            events.append({'game_id': game_id, 'seq': seq, 'type': 'join', 'number': seq, 'user_id': user_id})
+        for seq, number in enumerate(rng.sample(range(1, 76), 20), len(players) + 1):
+            events.append({'game_id': game_id, 'seq': seq, 'type': 'draw', 'number': number})
+    db.session.execute(db.insert(GameParticipant), participants)
+    db.session.execute(db.insert(GameEvent), events)
+    db.session.execute(db.insert(Transaction), [{
+        'user_id': rng.randint(1, USERS),
+        'type': rng.choice(['deposit', 'withdrawal', 'game_entry', 'prize']),
+        'status': rng.choices(['completed', 'pending', 'failed'], [90, 5, 5])[0],
+        'amount': 50.0, 'created_at': now - timedelta(seconds=i),
+    } for i in range(20000)])
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+def compiled(statement) -> str:
+    return str(statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+
+def sqlite_full_scans(statement) -> list:
+    plan = db.session.execute(text('EXPLAIN QUERY PLAN ' + compiled(statement))).all()
+    # "SCAN users" reads the whole table; "SCAN users USING INDEX ..." walks an index in order
+    return [row.detail for row in plan if re.match(r'SCAN (TABLE )?\w+$', row.detail)]
+
+def postgres_full_scans(statement) -> list:
+    db.session.execute(text('SET enable_seqscan = off'))
+    plan = db.session.execute(text('EXPLAIN (FORMAT JSON) ' + compiled(statement))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scans, nodes = [], [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node['Node Type'] == 'Seq Scan':
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        nodes.extend(node.get('Plans', []))
+    return scans
+
+def check_query_plans(url: str, full_scans):
+    app = Flask(__name__)
+    os.environ['DATABASE_URL'], previous = url, os.environ.get('DATABASE_URL')
+    try:
+        init_db(app)
+    finally:
+        if previous is None:
+            del os.environ['DATABASE_URL']
+        else:
+            os.environ['DATABASE_URL'] = previous
+
+    with app.app_context():
+        seed()
+        failures = {}
+        for name, query in HOT_QUERIES.items():
+            scans = full_scans(query())
+            if scans:
+                failures[name] = scans
+        db.session.remove()
+        db.engine.dispose()
+    assert not failures, f"Hot queries scanning whole tables: {json.dumps(failures, indent=2)}"
+
+def test_sqlite_query_plans(tmp_path):
+    check_query_plans(f"sqlite:///{tmp_path / 'plans.db'}", sqlite_full_scans)
+
+def test_postgres_query_plans():
+    url = os.getenv('TEST_POSTGRES_URL')
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL not set")
+    schema = f"query_plans_{os.getpid()}"
+    admin = create_engine(url)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    try:
+        sep = '&' if '?' in url else '?'
+        check_query_plans(f"{url}{sep}options=-csearch_path%3D{schema}", postgres_full_scans)
+    finally:
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
@@ -0,0 +1,75 @@
+"""
+Failure handling of the write-behind buffer.
+Use: python -m pytest test_write_behind.py
+
+A row the database rejects must not take the rest of its batch down with
+it, and a flush that fails for any other reason must keep its writes
+queued, ahead of newer ones, for the next flush.
+"""
+
+import os
+from datetime import datetime
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
+from database import db, init_db
+from models import Game, GameEvent
+from write_behind import WriteBehindBuffer
+
+def new_buffer(tmp_path) -> WriteBehindBuffer:
+    app = Flask(__name__)
+    os.environ['DATABASE_URL'], previous = f"sqlite:///{tmp_path / 'wb.db'}", os.environ.get('DATABASE_URL')
+    try:
+        init_db(app)
+    finally:
+        if previous is None:
+            del os.environ['DATABASE_URL']
+        else:
+            os.environ['DATABASE_URL'] = previous
+    with app.app_context():
+        for game_id in (1, 2):
+            db.session.add(Game(id=game_id, game_code=f"W{game_id}", entry_price=10, status='waiting'))
+        db.session.commit()
+    return WriteBehindBuffer(app, interval=3600)
+
+def event(game_id: int, seq: int) -> dict:
+    return {'game_id': game_id, 'seq': seq, 'type': 'draw', 'number': seq, 'created_at': datetime.utcnow()}
+
+def rows(buffer: WriteBehindBuffer, *columns):
+    with buffer.app.app_context():
+        return db.session.execute(db.select(*columns).order_by(*columns)).all()
+
+def test_rejected_row_is_dropped_alone(tmp_path):
+    buffer = new_buffer(tmp_path)
+    buffer.insert(GameEvent, **event(1, 1))
+    assert buffer.flush() == 1
+
+    buffer.insert(GameEvent, **event(1, 1))  # Duplicate (game_id, seq)
+    buffer.insert(GameEvent, **event(1, 2))
+    buffer.update(Game, 2, status='active')
+    assert buffer.flush() == 2
+
+    assert rows(buffer, GameEvent.game_id, GameEvent.seq) == [(1, 1), (1, 2)]
+    assert rows(buffer, Game.id, Game.status) == [(1, 'waiting'), (2, 'active')]
+    assert buffer.counters['dropped'] == 1 and buffer.pending == 0
+
+def test_failed_flush_is_retried(tmp_path):
+    buffer = new_buffer(tmp_path)
+    buffer.insert(GameEvent, **event(1, 1))
+    buffer.update(Game, 1, status='active', event_seq=1)
+
+    write_batch = buffer._write_batch
+    def locked(*args):
+        # Newer writes land while the failing transaction runs
+        buffer.insert(GameEvent, **event(1, 2))
+        buffer.update(Game, 1, event_seq=2)
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+    buffer._write_batch = locked
+    assert buffer.flush() == 0
+    assert buffer.pending == 3 and buffer.counters['errors'] == 1
+
+    buffer._write_batch = write_batch
+    assert buffer.flush() == 3
+    assert rows(buffer, GameEvent.game_id, GameEvent.seq) == [(1, 1), (1, 2)]
+    assert rows(buffer, Game.id, Game.status, Game.event_seq) == [(1, 'active', 2), (2, 'waiting', 0)]
@@ -0,0 +1,155 @@
+"""
+NumPy game engine for very large rooms.
+All cartelas live in one (N, 25) uint8 array and marks in bit-packed
+uint32 arrays, so each draw updates every card in one vectorized pass.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+from game_logic import (
+    BingoGame, Cartela, CARTELAS, FREE_INDEX, FREE_MASK, PatternSet, PlayerCard,
+    call_positions, get_pattern_set, mask_to_indices
+)
+
+_CELL_BITS = np.left_shift(np.uint32(1), np.arange(25, dtype=np.uint32))
+_TABLES = {}  # pattern set name -> (5, 32) uint64 row lookup tables
+_CELLS = {}   # pattern set name -> (patterns, width) cell indices
+
+def _pattern_tables(patterns: PatternSet) -> np.ndarray:
+    if patterns.name not in _TABLES:
+        if len(patterns.masks) > 64:
+            raise ValueError(f"Pattern set {patterns.name} has more than 64 patterns")
+        _TABLES[patterns.name] = np.array(patterns.tables, dtype=np.uint64)
+    return _TABLES[patterns.name]
+
+def _pattern_cells(patterns: PatternSet) -> np.ndarray:
+    """Pattern cells padded with the FREE cell, which is always "called" at 0"""
+    if patterns.name not in _CELLS:
+        width = max(len(cells) for cells in patterns.cells)
+        _CELLS[patterns.name] = np.array(
+            [cells + (FREE_INDEX,) * (width - len(cells)) for cells in patterns.cells]
+        )
+    return _CELLS[patterns.name]
+
+# Whole cartela pool as one array; row n is cartela n (row 0 unused)
+POOL_CARDS = np.zeros((len(CARTELAS) + 1, 25), dtype=np.uint8)
+for _number, _cartela in CARTELAS.items():
+    POOL_CARDS[_number] = _cartela.board
+
+def earliest_win_calls(draw_order, cards: np.ndarray = POOL_CARDS,
+                       pattern_set: Optional[str] = None) -> np.ndarray:
+    """Earliest winning call for every card in one vectorized pass.
+    
+    Entry n is the 1-based call on which card n first completes a pattern,
+    or NEVER_CALLED if it does not within the draw order.
+    """
+    positions = np.array(call_positions(draw_order), dtype=np.uint8)
+    win_cells = _pattern_cells(get_pattern_set(pattern_set))
+    cell_calls = positions[cards]                             # (N, 25) call per cell
+    return cell_calls[:, win_cells].max(axis=2).min(axis=1)  # (N, patterns, width) -> (N,)
+
+def winning_rows(masks: np.ndarray, patterns: Optional[PatternSet] = None) -> np.ndarray:
+    """Boolean array: which marks masks complete any pattern of the set"""
+    tables = _pattern_tables(patterns or get_pattern_set(None))
+    wins = tables[0][masks & 31]
+    for row in range(1, 5):
+        wins &= tables[row][masks >> (row * 5) & 31]
+    return wins != 0
+
+class RowPlayerCard(PlayerCard):
+    """Seat in a VectorBingoGame; its marks live in the game's arrays at `row`"""
+    __slots__ = ('row',)
+
+    def __init__(self, user_id: int, card: Cartela, row: int):
+        super().__init__(user_id, card)
+        self.row = row
+
+class VectorBingoGame(BingoGame):
+    """BingoGame backed by NumPy arrays instead of per-player objects"""
+    __slots__ = ('cards', 'marked', 'called', 'row_users')
+
+    def __init__(self, game_code: str, entry_price: float, max_players: int = 100,
+                 auto_daub: bool = False, seed: Optional[int] = None,
+                 pattern_set: Optional[str] = None):
+        super().__init__(game_code, entry_price, max_players, auto_daub, seed, pattern_set)
+        capacity = min(max_players, 64)
+        self.cards = np.zeros((capacity, 25), dtype=np.uint8)  # row -> cartela numbers
+        self.marked = np.zeros(capacity, dtype=np.uint32)      # row -> marked cells mask
+        self.called = np.zeros(capacity, dtype=np.uint32)      # row -> called cells mask
+        self.row_users: List[int] = []                          # row -> user_id
+
+    def _grow(self):
+        """Double array capacity"""
+        capacity = len(self.cards) * 2
+        self.cards = np.resize(self.cards, (capacity, 25))
+        self.marked = np.resize(self.marked, capacity)
+        self.called = np.resize(self.called, capacity)
+
+    def _register_player(self, user_id: int, cartela: Cartela):
+        row = len(self.row_users)
+        if row == len(self.cards):
+            self._grow()
+
+        self.cards[row] = cartela.board
+        self.marked[row] = FREE_MASK
+        self.called[row] = FREE_MASK
+        self.row_users.append(user_id)
+        self.players[user_id] = RowPlayerCard(user_id, cartela, row)
+        self.taken_cartelas |= 1 << cartela.number
+
+    def _apply_call(self, number: int):
+        """Update every card holding the number and collect winners in one pass"""
+        count = len(self.row_users)
+        rows, cells = np.nonzero(self.cards[:count] == number)
+        if not len(rows):
+            return
+
+        bits = _CELL_BITS[cells]
+        self.called[rows] |= bits
+        if self.auto_daub:
+            self.marked[rows] |= bits
+
+        for row in rows[winning_rows(self.called[rows], self.patterns)]:
+            self.potential_winners.add(self.row_users[row])
+
+    def mark_number(self, user_id: int, number: int) -> bool:
+        """Mark a number on player's cartela; only while the game is active"""
+        if self.status != "active" or user_id not in self.players:
+            return False
+
+        player = self.players[user_id]
+        index = player.card.index.get(number)
+        if index is None:
+            return False
+
+        row = player.row
+        bit = 1 << index
+        if not int(self.called[row]) & bit:
+            return False
+
+        if int(self.marked[row]) & bit:
+            return False
+
+        self.marked[row] |= np.uint32(bit)
+        return True
+
+    def check_winner(self, user_id: int) -> bool:
+        """Check if player has a winning pattern"""
+        if user_id not in self.players:
+            return False
+
+        row = self.players[user_id].row
+        return bool(winning_rows(self.marked[row:row + 1], self.patterns)[0])
+
+    def get_winners(self) -> List[int]:
+        """All players whose marks complete a pattern, in one vectorized pass"""
+        count = len(self.row_users)
+        return [self.row_users[row] for row in np.nonzero(winning_rows(self.marked[:count], self.patterns))[0]]
+
+    def get_player_marked(self, user_id: int) -> List[int]:
+        """Get player's marked positions"""
+        if user_id in self.players:
+            return mask_to_indices(int(self.marked[self.players[user_id].row]))
+        return []
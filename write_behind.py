@@ -0,0 +1,217 @@
+"""
+Write-behind buffer for hot-path database writes.
+
+Routes queue inserts and row updates here instead of committing per
+request. A background thread flushes everything queued, across all games,
+in one transaction every `interval` seconds or once `max_pending` writes
+are queued. Updates to the same row (by primary key, or by another unique
+key with update_where) coalesce into one UPDATE. Callers
+flush() synchronously at durability points (game start, winner declared).
+A failed flush keeps its writes queued for the next one; rows the
+database rejects outright are logged and dropped, the rest still land.
+"""
+
+import os
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindBuffer:
+    def __init__(self, app, interval: float = 0.5, max_pending: int = 1000):
+        self.app = app
+        self.interval = interval
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # One flush at a time, in commit order
+        self.wakeup = threading.Event()
+        self.inserts: Dict[type, List[dict]] = defaultdict(list)
+        self.updates: Dict[Tuple[type, int], dict] = {}
+        self.keyed_updates: Dict[Tuple[type, tuple], dict] = {}  # (model, unique key) -> values
+        self.pending = 0
+        self.pid = None
+        self.counters = {
+            'writes': 0,       # inserts + updates queued
+            'coalesced': 0,    # updates merged into an already queued row update
+            'rows': 0,         # rows written by flushes
+            'flushes': 0,      # transactions committed
+            'sync_flushes': 0, # flushes forced at durability points
+            'errors': 0,       # failed flushes, retried later
+            'dropped': 0,      # rows the database rejected
+        }
+        atexit.register(self.flush)
+
+    def _ensure_thread(self):
+        # (Re)start the flusher in this process, e.g. after a gunicorn fork
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            threading.Thread(target=self._run, name="write-behind", daemon=True).start()
+
+    def insert(self, model, **values):
+        """Queue a row insert"""
+        with self.lock:
+            self.inserts[model].append(values)
+            self._queued()
+
+    def update(self, model, pk: int, **values):
+        """Queue a row update by primary key; later values win"""
+        with self.lock:
+            key = (model, pk)
+            if key in self.updates:
+                self.counters['coalesced'] += 1
+                self.updates[key].update(values)
+            else:
+                self.updates[key] = {'id': pk, **values}
+            self._queued()
+
+    def update_where(self, model, match: Dict[str, object], **values):
+        """Queue an update of the row whose columns equal `match`, a unique key; later values win"""
+        with self.lock:
+            key = (model, tuple(sorted(match.items())))
+            if key in self.keyed_updates:
+                self.counters['coalesced'] += 1
+                self.keyed_updates[key].update(values)
+            else:
+                self.keyed_updates[key] = dict(values)
+            self._queued()
+
+    def _queued(self):
+        self.counters['writes'] += 1
+        self.pending += 1
+        self._ensure_thread()
+        if self.pending >= self.max_pending:
+            self.wakeup.set()
+
+    def flush(self, sync: bool = False) -> int:
+        """Write everything queued in one transaction; returns rows written.
+        
+        Never raises. If the database rejects a row, the batch is written row
+        by row and only the rejected rows are dropped. On any other error the
+        batch is put back ahead of newer writes and retried on the next flush.
+        """
+        with self.flush_lock:
+            with self.lock:
+                inserts, self.inserts = self.inserts, defaultdict(list)
+                updates, self.updates = self.updates, {}
+                keyed_updates, self.keyed_updates = self.keyed_updates, {}
+                self.pending = 0
+            if not inserts and not updates and not keyed_updates:
+                return 0
+
+            with self.app.app_context():
+                try:
+                    rows = self._write_batch(inserts, updates, keyed_updates)
+                except (IntegrityError, DataError) as e:
+                    db.session.rollback()
+                    logger.warning(f"Write-behind batch rejected, writing rows one by one: {str(e)}")
+                    try:
+                        rows = self._write_rows(inserts, updates, keyed_updates)
+                    except Exception as e:
+                        return self._failed(e, inserts, updates, keyed_updates)
+                except Exception as e:
+                    return self._failed(e, inserts, updates, keyed_updates)
+
+            with self.lock:
+                self.counters['rows'] += rows
+                self.counters['flushes'] += 1
+                if sync:
+                    self.counters['sync_flushes'] += 1
+            return rows
+
+    @staticmethod
+    def _keyed_statement(model, key_columns, value_columns):
+        table = model.__table__
+        return (db.update(table)
+                .where(*(table.c[k] == db.bindparam(f"k_{k}") for k in key_columns))
+                .values({k: db.bindparam(f"v_{k}") for k in value_columns}))
+
+    @staticmethod
+    def _keyed_params(match, values) -> dict:
+        return {**{f"k_{k}": v for k, v in match}, **{f"v_{k}": v for k, v in values.items()}}
+
+    def _write_batch(self, inserts, updates, keyed_updates) -> int:
+        grouped = defaultdict(list)
+        for (model, _), values in updates.items():
+            grouped[model].append(values)
+        
+        # One executemany per (model, key columns, value columns)
+        keyed = defaultdict(list)
+        for (model, match), values in keyed_updates.items():
+            keyed[model, tuple(k for k, _ in match), tuple(sorted(values))].append(
+                self._keyed_params(match, values))
+
+        for model, rows in inserts.items():
+            db.session.execute(db.insert(model), rows)
+        for model, rows in grouped.items():
+            db.session.execute(db.update(model), rows)
+        for (model, key_columns, value_columns), rows in keyed.items():
+            db.session.execute(self._keyed_statement(model, key_columns, value_columns), rows)
+        db.session.commit()
+        return sum(len(r) for r in inserts.values()) + len(updates) + len(keyed_updates)
+
+    def _write_rows(self, inserts, updates, keyed_updates) -> int:
+        """Commit a rejected batch one row at a time, removing rows from it as they are done"""
+        written = 0
+        for model, rows in inserts.items():
+            while rows:
+                written += self._write_row(db.insert(model), rows[0])
+                rows.pop(0)
+        for key in list(updates):
+            written += self._write_row(db.update(key[0]), updates[key])
+            del updates[key]
+        for key in list(keyed_updates):
+            (model, match), values = key, keyed_updates[key]
+            statement = self._keyed_statement(model, [k for k, _ in match], sorted(values))
+            written += self._write_row(statement, self._keyed_params(match, values))
+            del keyed_updates[key]
+        return written
+
+    def _write_row(self, statement, row: dict) -> int:
+        try:
+            db.session.execute(statement, [row])
+            db.session.commit()
+            return 1
+        except (IntegrityError, DataError) as e:
+            db.session.rollback()
+            self.counters['dropped'] += 1
+            logger.error(f"Write-behind dropped a rejected row {row}: {str(e)}")
+            return 0
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _failed(self, error, inserts, updates, keyed_updates) -> int:
+        """Put an unwritten batch back ahead of the writes queued since"""
+        db.session.rollback()
+        self.counters['errors'] += 1
+        logger.error(f"Write-behind flush failed, retrying later: {str(error)}")
+        with self.lock:
+            for model, rows in self.inserts.items():
+                inserts[model].extend(rows)
+            for key, values in self.updates.items():
+                updates[key] = {**updates[key], **values} if key in updates else values
+            for key, values in self.keyed_updates.items():
+                keyed_updates[key] = {**keyed_updates[key], **values} if key in keyed_updates else values
+            self.inserts = defaultdict(list, {model: rows for model, rows in inserts.items() if rows})
+            self.updates, self.keyed_updates = updates, keyed_updates
+            self.pending = sum(len(r) for r in self.inserts.values()) + len(updates) + len(keyed_updates)
+        return 0
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = dict(self.counters, pending=self.pending)
+        stats['batching_ratio'] = stats['writes'] / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+WebSocket gateway for large rooms
+Use: python ws_gateway.py [--port 8765]
+
+Runs app.py and an aiohttp WebSocket server in one process, so every event
+app.py records (draws from call_next_number, joins, wins) reaches the
+gateway through its EventBus. Clients keep one socket at /ws and send JSON:
+
+    {"type": "subscribe", "game_ids": [1, 2]}
+    {"type": "unsubscribe", "game_ids": [2]}
+    {"type": "mark", "game_id": 1, "number": 42}
+
+Each event is encoded once and the same frame payload is queued to every
+subscriber of its game. Every connection has a bounded outbound queue; one
+that falls `queue_size` messages behind is closed, and its client
+resubscribes and catches up from /game/<id>/events. GET /metrics reports
+queue depths (backpressure) and publish-to-write fan-out latency.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from typing import Callable, Dict, Optional, Set
+
+from aiohttp import WSCloseCode, WSMsgType, web
+
+from config import WS_PORT, WS_QUEUE_SIZE
+from game_store import GameStore
+from pubsub import EventBus
+
+class Connection:
+    __slots__ = ('ws', 'user_id', 'games', 'queue', 'sent', 'max_depth', 'max_latency')
+
+    def __init__(self, ws: web.WebSocketResponse, user_id: Optional[int], queue_size: int):
+        self.ws = ws
+        self.user_id = user_id
+        self.games: Set[int] = set()
+        self.queue = asyncio.Queue(queue_size)  # (payload, published at) frames to write
+        self.sent = 0
+        self.max_depth = 0
+        self.max_latency = 0.0
+
+class WebSocketGateway:
+    def __init__(self, event_bus: EventBus, store: GameStore,
+                 mark: Callable[[int, Optional[int], int], tuple],
+                 session_user: Callable[[dict], Optional[int]], queue_size: int = 256):
+        self.event_bus = event_bus
+        self.store = store
+        self.mark = mark                  # (game_id, user_id, number) -> (response, status)
+        self.session_user = session_user  # request cookies -> user_id
+        self.queue_size = queue_size
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.rooms: Dict[int, Set[Connection]] = {}
+        self.connections: Set[Connection] = set()
+        self.counters = {
+            'broadcasts': 0,   # events encoded
+            'frames': 0,       # frames written to sockets
+            'slow_closed': 0,  # connections closed for falling behind
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+        }
+
+    def web_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/ws', self.handle)
+        app.router.add_get('/metrics', self.metrics)
+        app.on_startup.append(self._attach)
+        return app
+
+    async def _attach(self, app):
+        self.loop = asyncio.get_running_loop()
+        self.event_bus.listen(self._on_event)
+
+    def _on_event(self, game_id: int, event: dict):
+        # Runs on whichever thread recorded the event
+        if game_id in self.rooms:
+            self.loop.call_soon_threadsafe(self.broadcast, game_id, event, time.monotonic())
+
+    def broadcast(self, game_id: int, event: dict, published: float):
+        """Encode an event once and queue it to every subscriber of its game"""
+        room = self.rooms.get(game_id)
+        if not room:
+            return
+        payload = json.dumps({'game_id': game_id, **event}).encode()
+        self.counters['broadcasts'] += 1
+        for conn in list(room):
+            self._queue(conn, payload, published)
+
+    def _queue(self, conn: Connection, payload: bytes, published: float):
+        try:
+            conn.queue.put_nowait((payload, published))
+        except asyncio.QueueFull:
+            self.counters['slow_closed'] += 1
+            self._drop(conn)
+            self.loop.create_task(conn.ws.close(code=WSCloseCode.TRY_AGAIN_LATER, message=b'Too slow'))
+            return
+        conn.max_depth = max(conn.max_depth, conn.queue.qsize())
+
+    def _reply(self, conn: Connection, message: dict):
+        self._queue(conn, json.dumps(message).encode(), time.monotonic())
+
+    def _drop(self, conn: Connection):
+        for game_id in conn.games:
+            room = self.rooms.get(game_id)
+            if room is not None:
+                room.discard(conn)
+                if not room:
+                    del self.rooms[game_id]
+        conn.games.clear()
+        self.connections.discard(conn)
+
+    async def _writer(self, conn: Connection):
+        while True:
+            payload, published = await conn.queue.get()
+            await conn.ws.send_frame(payload, WSMsgType.TEXT)
+            latency = time.monotonic() - published
+            conn.sent += 1
+            conn.max_latency = max(conn.max_latency, latency)
+            self.counters['frames'] += 1
+            self.counters['latency_total'] += latency
+            self.counters['latency_max'] = max(self.counters['latency_max'], latency)
+
+    async def handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+
+        conn = Connection(ws, self.session_user(request.cookies), self.queue_size)
+        self.connections.add(conn)
+        writer = asyncio.create_task(self._writer(conn))
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    data = json.loads(msg.data)
+                    await self.handle_message(conn, data)
+                except (ValueError, KeyError, TypeError) as e:
+                    self._reply(conn, {'type': 'error', 'error': f"Bad message: {e}"})
+        finally:
+            writer.cancel()
+            self._drop(conn)
+        return ws
+
+    async def handle_message(self, conn: Connection, data: dict):
+        kind = data['type']
+        if kind == 'subscribe':
+            for game_id in map(int, data['game_ids']):
+                game = self.store.get(game_id)
+                if game is None:
+                    self._reply(conn, {'type': 'error', 'game_id': game_id, 'error': 'Game not found'})
+                    continue
+                self.rooms.setdefault(game_id, set()).add(conn)
+                conn.games.add(game_id)
+                self._reply(conn, {
+                    'type': 'subscribed',
+                    'game_id': game_id,
+                    'seq': game.event_seq,
+                    'status': game.status,
+                    'called_numbers': game.called_numbers,
+                })
+
+        elif kind == 'unsubscribe':
+            for game_id in map(int, data['game_ids']):
+                conn.games.discard(game_id)
+                room = self.rooms.get(game_id)
+                if room is not None:
+                    room.discard(conn)
+                    if not room:
+                        del self.rooms[game_id]
+
+        elif kind == 'mark':
+            game_id = int(data['game_id'])
+            # Marks take the game lock and may flush to the database
+            result, _ = await self.loop.run_in_executor(
+                None, self.mark, game_id, conn.user_id, int(data['number']))
+            self._reply(conn, {'type': 'mark', 'game_id': game_id, **result})
+
+        else:
+            self._reply(conn, {'type': 'error', 'error': f"Unknown message type: {kind}"})
+
+    def stats(self) -> dict:
+        frames = self.counters['frames']
+        depths = [conn.queue.qsize() for conn in self.connections]
+        slowest = sorted(self.connections, key=lambda c: c.queue.qsize(), reverse=True)[:20]
+        return {
+            'connections': len(self.connections),
+            'rooms': len(self.rooms),
+            'broadcasts': self.counters['broadcasts'],
+            'frames': frames,
+            'slow_closed': self.counters['slow_closed'],
+            'fanout_latency_avg_ms': self.counters['latency_total'] / frames * 1000 if frames else 0.0,
+            'fanout_latency_max_ms': self.counters['latency_max'] * 1000,
+            'queue_depth_max': max(depths, default=0),
+            'slowest_connections': [{
+                'user_id': conn.user_id,
+                'games': sorted(conn.games),
+                'queue_depth': conn.queue.qsize(),
+                'max_queue_depth': conn.max_depth,
+                'sent': conn.sent,
+                'max_latency_ms': conn.max_latency * 1000,
+            } for conn in slowest],
+        }
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.json_response({'success': True, 'gateway': self.stats()})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the web app with a WebSocket gateway")
+    parser.add_argument('--port', type=int, default=WS_PORT, help="WebSocket port")
+    args = parser.parse_args(argv)
+
+    from werkzeug.serving import make_server
+    from app import app, event_bus, game_store, place_mark, recover_games
+    recover_games()
+
+    # Flask session cookies identify players on the socket too
+    serializer = app.session_interface.get_signing_serializer(app)
+
+    def session_user(cookies) -> Optional[int]:
+        try:
+            return serializer.loads(cookies.get(app.config['SESSION_COOKIE_NAME'], '')).get('user_id')
+        except Exception:
+            return None
+
+    port = int(os.environ.get("PORT", 5000))
+    server = make_server('0.0.0.0', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="flask", daemon=True).start()
+
+    gateway = WebSocketGateway(event_bus, game_store, place_mark, session_user, WS_QUEUE_SIZE)
+    print(f"🌐 Web app on http://0.0.0.0:{port}")
+    print(f"🔌 WebSocket gateway on ws://0.0.0.0:{args.port}/ws")
+    web.run_app(gateway.web_app(), port=args.port, print=None)
+
+if __name__ == "__main__":
+    sys.exit(main())